@@ -2,10 +2,10 @@
 配置管理模块 - 统一管理所有配置项
 """
 from dataclasses import dataclass
-from typing import List, Dict, Any
+from typing import Tuple, Dict, Any
 import os
 
-@dataclass
+@dataclass(frozen=True)
 class AudioProcessingConfig:
     """音频处理配置"""
     MAX_FILE_SIZE_MB: int = 25
@@ -13,16 +13,19 @@ class AudioProcessingConfig:
     CONVERSION_TIMEOUT_SECONDS: int = 60
     RETRY_COUNT: int = 2
     RETRY_DELAY_SECONDS: float = 1.0
-    SUPPORTED_FORMATS: List[str] = None
+    SUPPORTED_FORMATS: Tuple[str, ...] = None
     
     def __post_init__(self):
+        # 配置对象不可变，默认值通过 object.__setattr__ 填充，列表转为元组
         if self.SUPPORTED_FORMATS is None:
-            self.SUPPORTED_FORMATS = [
+            object.__setattr__(self, 'SUPPORTED_FORMATS', (
                 'flac', 'm4a', 'mp3', 'mp4', 'mpeg', 'mpga', 
                 'oga', 'ogg', 'wav', 'webm'
-            ]
+            ))
+        else:
+            object.__setattr__(self, 'SUPPORTED_FORMATS', tuple(self.SUPPORTED_FORMATS))
 
-@dataclass 
+@dataclass(frozen=True)
 class TempFileConfig:
     """临时文件配置"""
     TEMP_DIR_NAME: str = "astrbot_voice_temp"
@@ -30,38 +33,41 @@ class TempFileConfig:
     MAX_TEMP_FILES: int = 100
     CLEANUP_INTERVAL_MINUTES: int = 30
 
-@dataclass
+@dataclass(frozen=True)
 class FFmpegConfig:
     """FFmpeg配置"""
     SEARCH_CACHE_TIMEOUT_SECONDS: int = 3600  # 1小时缓存
     CONVERSION_TIMEOUT_SECONDS: int = 20  # 转换超时时间
     RETRY_COUNT: int = 2  # 重试次数
     RETRY_DELAY_SECONDS: float = 1.0  # 重试延迟
-    COMMON_PATHS: List[str] = None
+    COMMON_PATHS: Tuple[str, ...] = None
     
     def __post_init__(self):
         if self.COMMON_PATHS is None:
             if os.name == 'nt':  # Windows
-                self.COMMON_PATHS = [
+                common_paths = (
                     r'C:\ffmpeg\bin\ffmpeg.exe',
                     r'C:\Program Files\FFmpeg\bin\ffmpeg.exe',
                     os.path.expanduser(r'~\scoop\apps\ffmpeg\current\bin\ffmpeg.exe'),
-                ]
+                )
             else:  # Unix/Linux/Mac
-                self.COMMON_PATHS = [
+                common_paths = (
                     '/usr/bin/ffmpeg',
                     '/usr/local/bin/ffmpeg',
                     '/opt/homebrew/bin/ffmpeg',
-                ]
+                )
+            object.__setattr__(self, 'COMMON_PATHS', common_paths)
+        else:
+            object.__setattr__(self, 'COMMON_PATHS', tuple(self.COMMON_PATHS))
 
-@dataclass
+@dataclass(frozen=True)
 class LoggingConfig:
     """日志配置"""
     ENABLE_DEBUG: bool = False
     ENABLE_PERFORMANCE_LOGGING: bool = True
     LOG_CONVERSION_DETAILS: bool = True
 
-@dataclass
+@dataclass(frozen=True)
 class PluginConfig:
     """插件总配置"""
     audio: AudioProcessingConfig
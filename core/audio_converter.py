@@ -2,7 +2,8 @@
 重构后的音频转换器 - 使用工厂模式彻底解决循环导入
 """
 import os
-from typing import Optional
+import asyncio
+from typing import Optional, List, Tuple
 from astrbot.api import logger
 from ..config import PluginConfig
 from ..exceptions import AudioConversionError, FileValidationError
@@ -37,8 +38,15 @@ class AudioConverter:
     
     @async_operation_handler("音频文件验证", log_performance=False)
     async def validate_audio_file(self, file_path: str) -> bool:
-        """验证音频文件"""
-        return self.format_detector.validate_file(file_path)
+        """验证音频文件 - 文件IO在线程中执行，不阻塞事件循环"""
+        return await asyncio.to_thread(self.format_detector.validate_file, file_path)
+    
+    async def inspect_audio_file(self, file_path: str, trust_extension: bool = False) -> Tuple[int, str]:
+        """一次打开文件完成校验、大小获取和格式检测，返回 (文件大小, 格式名称)
+
+        trust_extension 仅在文件由框架生成时传入True，见 AudioFormatDetector.inspect_file
+        """
+        return await self.format_detector.inspect_file(file_path, trust_extension)
     
     @async_operation_handler("音频格式检测")
     async def detect_format(self, file_path: str) -> str:
@@ -47,39 +55,42 @@ class AudioConverter:
     
     @async_operation_handler("音频格式转换")
     async def convert_to_supported_format(self, input_path: str, 
-                                        output_path: str = None) -> Optional[str]:
+                                        output_path: str = None,
+                                        input_format: str = None) -> Optional[str]:
         """
         将音频转换为STT支持的格式 - 修复版本（避免文件被过早清理）
         
         Args:
             input_path: 输入文件路径
             output_path: 输出文件路径，如果为None则自动生成
+            input_format: 已检测出的输入格式，为None时重新检测
             
         Returns:
             str: 转换后的文件路径，如果不需要转换则返回原路径
         """
         try:
-            # 1. 检测格式
-            input_format = await self.detect_format(input_path)
+            # 1. 检测格式（调用方已检测过时直接复用）
+            if input_format is None:
+                input_format = await self.detect_format(input_path)
             
             if input_format == 'invalid':
                 raise FileValidationError("输入文件无效")
             
             # 2. 检查是否需要转换
             if self.format_detector.is_supported_format(input_format):
-                logger.info(f"音频格式 {input_format} 已支持，无需转换")
+                logger.info("音频格式 %s 已支持，无需转换", input_format)
                 return input_path
             
             # 3. 生成输出路径 - 修复版本：不使用context manager避免过早清理
             if output_path is None:
                 # 创建持久化的临时文件，不自动清理
                 output_path = self.temp_manager.create_temp_file('.mp3', 'converted_')
-                logger.info(f"生成转换输出路径: {output_path}")
+                logger.info("生成转换输出路径: %s", output_path)
             
             # 4. 确保输出目录存在
             output_dir = os.path.dirname(output_path)
             os.makedirs(output_dir, exist_ok=True)
-            logger.debug(f"确保输出目录存在: {output_dir}")
+            logger.debug("确保输出目录存在: %s", output_dir)
             
             # 5. 执行转换
             strategy_manager = self._get_strategy_manager()
@@ -88,35 +99,27 @@ class AudioConverter:
             )
             
             if success:
-                # 验证转换结果
-                if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                    logger.info(f"✅ 音频转换成功: {input_path} -> {output_path}")
-                    logger.info(f"输出文件大小: {os.path.getsize(output_path)} bytes")
-                    return output_path
-                else:
-                    logger.error(f"❌ 转换后文件无效: {output_path}")
-                    # 清理无效文件
-                    if os.path.exists(output_path):
-                        try:
-                            os.remove(output_path)
-                        except:
-                            pass
-                    raise AudioConversionError("转换成功但输出文件无效")
+                # 策略管理器返回成功前已验证输出文件非空，这里无需再次检查
+                logger.info("✅ 音频转换成功: %s -> %s", input_path, output_path)
+                return output_path
             else:
                 logger.error("❌ 音频转换策略执行失败")
                 raise AudioConversionError("转换失败")
                 
         except Exception as e:
-            logger.error(f"音频转换失败: {e}")
+            logger.error("音频转换失败: %s", e)
             raise
     
     def get_format_info(self, file_path: str) -> dict:
         """获取音频文件格式信息"""
         return self.format_detector.get_format_info(file_path)
     
-    def cleanup_temp_files(self):
-        """清理临时文件"""
-        self.temp_manager.cleanup_all()
+    def cleanup_temp_files(self, file_paths: List[str] = None):
+        """清理临时文件，指定路径时只清理这些文件"""
+        if file_paths is None:
+            self.temp_manager.cleanup_all()
+        else:
+            self.temp_manager.release_files(file_paths)
     
     def get_status(self) -> dict:
         """获取转换器状态"""
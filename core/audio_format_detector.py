@@ -2,68 +2,169 @@
 音频格式检测器 - 专门负责音频文件格式识别
 """
 import os
+import stat
+import asyncio
+import logging
 from typing import Optional, Dict, Tuple
 from astrbot.api import logger
 from ..config import AudioProcessingConfig
 from ..exceptions import AudioFormatError, FileValidationError
 from ..utils.decorators import cache_result
 
+# 音频格式签名表 (文件头前缀, 格式名)，按匹配顺序排列
+_MAGIC_SIGNATURES = (
+    (b'#!AMR', 'amr'),
+    (b'\x02#!SILK_V3', 'silk'),
+    (b'ID3', 'mp3'),
+    (b'\xff\xfb', 'mp3'),
+    (b'\xff\xf3', 'mp3'),
+    (b'\xff\xf2', 'mp3'),
+    (b'RIFF', 'wav'),  # 需要进一步检查WAVE标识
+    (b'OggS', 'ogg'),
+    (b'fLaC', 'flac'),
+    (b'\x1aE\xdf\xa3', 'webm'),  # EBML 头 (WebM/Matroska)
+)
+
+# 可直接按 M4A 处理的 ftyp 主品牌；3GP/3G2 等其它品牌需要经 FFmpeg 转换
+_M4A_BRANDS = frozenset((
+    b'M4A ', b'M4B ', b'M4P ', b'mp41', b'mp42', b'isom', b'iso2', b'iso4', b'iso5', b'iso6', b'dash',
+))
+
+# 检测失败时的格式名，无法转换
+_UNDETECTED_FORMATS = frozenset(('invalid', 'unknown'))
+
+# 文件扩展名 -> 格式名
+_EXT_TO_FORMAT = {
+    '.amr': 'amr',
+    '.silk': 'silk',
+    '.mp3': 'mp3',
+    '.wav': 'wav',
+    '.ogg': 'ogg',
+    '.flac': 'flac',
+    '.m4a': 'm4a',
+    '.mp4': 'mp4',
+    '.mpeg': 'mpeg',
+    '.mpga': 'mpga',
+    '.oga': 'oga',
+    '.webm': 'webm',
+}
+
+
+def sniff_format(header: bytes) -> Optional[str]:
+    """
+    根据文件头魔数快速识别音频格式
+    
+    Args:
+        header: 文件开头的至少12个字节
+        
+    Returns:
+        str: 识别出的格式名称，无法识别时返回None
+    """
+    for signature, format_name in _MAGIC_SIGNATURES:
+        if header.startswith(signature):
+            # WAV格式需要额外验证WAVE标识
+            if format_name == 'wav' and header[8:12] != b'WAVE':
+                continue
+            return format_name
+    
+    # MP4/M4A 容器的 ftyp box 位于偏移4处，主品牌位于偏移8处
+    if header[4:8] == b'ftyp' and header[8:12] in _M4A_BRANDS:
+        return 'm4a'
+    
+    return None
+
+
 class AudioFormatDetector:
     """音频格式检测器"""
     
     def __init__(self, config: AudioProcessingConfig = None):
         self.config = config or AudioProcessingConfig()
+        self._max_file_size_bytes = self.config.MAX_FILE_SIZE_MB * 1024 * 1024
+        # 支持格式集合，构建一次后用于O(1)成员判断
+        self._supported_formats = frozenset(self.config.SUPPORTED_FORMATS)
         
         # 音频格式签名映射
-        self.format_signatures = {
-            b'#!AMR\n': 'amr',
-            b'#!AMR': 'amr',
-            b'\x02#!SILK_V3': 'silk',
-            b'ID3': 'mp3',
-            b'\xff\xfb': 'mp3',
-            b'\xff\xf3': 'mp3',
-            b'RIFF': 'wav',  # 需要进一步检查WAVE标识
-            b'OggS': 'ogg',
-            b'fLaC': 'flac',
-        }
+        self.format_signatures = dict(_MAGIC_SIGNATURES)
     
     def validate_file(self, file_path: str) -> bool:
         """验证文件是否存在且可读"""
+        return self._inspect_sync(file_path)[1] is not None
+    
+    def _inspect_sync(self, file_path: str, read_header: bool = True) -> Tuple[int, Optional[bytes]]:
+        """
+        打开文件一次，同时完成校验、获取大小和读取文件头
+        
+        Args:
+            file_path: 文件路径
+            read_header: 是否读取文件头；为False时只做大小校验，有效时返回空字节串
+        
+        Returns:
+            tuple: (文件大小, 文件头)，文件无效时文件头为None；无法访问时大小为-1
+        """
         try:
-            if not os.path.exists(file_path):
-                logger.error(f"文件不存在: {file_path}")
-                return False
+            try:
+                f = open(file_path, 'rb')
+            except FileNotFoundError:
+                logger.error("文件不存在: %s", file_path)
+                return -1, None
+
+            with f:
+                # 对已打开的文件 fstat，同时得到文件类型和大小
+                st = os.fstat(f.fileno())
+                file_size = st.st_size
+
+                if not stat.S_ISREG(st.st_mode):
+                    logger.error("路径不是文件: %s", file_path)
+                    return file_size, None
 
-            if not os.path.isfile(file_path):
-                logger.error(f"路径不是文件: {file_path}")
-                return False
+                if file_size == 0:
+                    logger.error("文件为空: %s", file_path)
+                    return file_size, None
 
-            file_size = os.path.getsize(file_path)
-            if file_size == 0:
-                logger.error(f"文件为空: {file_path}")
-                return False
+                if file_size < self.config.MIN_FILE_SIZE_BYTES:
+                    logger.error("文件太小: %s (%s bytes)", file_path, file_size)
+                    return file_size, None
 
-            if file_size < self.config.MIN_FILE_SIZE_BYTES:
-                logger.error(f"文件太小: {file_path} ({file_size} bytes)")
-                return False
+                if file_size > self._max_file_size_bytes:
+                    logger.error("文件过大: %s (%s bytes)", file_path, file_size)
+                    return file_size, None
 
-            if file_size > self.config.MAX_FILE_SIZE_MB * 1024 * 1024:
-                logger.error(f"文件过大: {file_path} ({file_size} bytes)")
-                return False
+                if not read_header:
+                    return file_size, b''
 
-            # 检查文件是否可读
-            with open(file_path, 'rb') as f:
                 header = f.read(12)
 
             if len(header) < 5:
-                logger.error(f"文件头过短: {file_path}")
-                return False
+                logger.error("文件头过短: %s", file_path)
+                return file_size, None
 
-            return True
+            return file_size, header
 
         except Exception as e:
-            logger.error(f"文件验证失败: {e}")
-            return False
+            logger.error("文件验证失败: %s", e)
+            return -1, None
+    
+    async def inspect_file(self, file_path: str, trust_extension: bool = False) -> Tuple[int, str]:
+        """
+        一次打开文件完成校验、大小获取和格式识别
+        
+        Args:
+            file_path: 音频文件路径
+            trust_extension: 文件是否由框架生成，此时扩展名已表明是STT支持的格式则信任扩展名，
+                跳过文件头读取和魔数识别；下载等来源的扩展名可能是猜测的，不可信任
+        
+        Returns:
+            tuple: (文件大小, 格式名称)，格式含义同 detect_format；无法访问时大小为-1
+        """
+        ext_format = self.detect_format_from_extension(file_path) if trust_extension else None
+        if ext_format is not None and ext_format in self._supported_formats:
+            file_size, header = await asyncio.to_thread(self._inspect_sync, file_path, False)
+            return file_size, ext_format if header is not None else 'invalid'
+        
+        file_size, header = await asyncio.to_thread(self._inspect_sync, file_path)
+        if header is None:
+            return file_size, 'invalid'
+        return file_size, self._format_from_header(header)
     
     @cache_result(ttl_seconds=300)  # 缓存5分钟
     async def detect_format(self, file_path: str) -> str:
@@ -74,61 +175,50 @@ class AudioFormatDetector:
             str: 检测到的格式名称，如果无法识别返回'unknown'，如果文件无效返回'invalid'
         """
         try:
-            if not self.validate_file(file_path):
+            # 文件校验和读取文件头都是阻塞IO，放到线程中执行
+            _, header = await asyncio.to_thread(self._inspect_sync, file_path)
+            if header is None:
                 return 'invalid'
 
-            with open(file_path, 'rb') as f:
-                header = f.read(12)
-
-            # 检测已知格式
-            detected_format = self._identify_format_by_header(header)
-            
-            if detected_format:
-                logger.info(f"检测到音频格式: {detected_format}")
-                return detected_format
-            else:
-                logger.warning(f"未知音频格式，文件头: {header[:10].hex()}")
-                return 'unknown'
+            return self._format_from_header(header)
 
         except Exception as e:
-            logger.error(f"检测音频格式失败: {e}")
+            logger.error("检测音频格式失败: %s", e)
             return 'invalid'
     
-    def _identify_format_by_header(self, header: bytes) -> Optional[str]:
-        """根据文件头识别格式"""
-        # 检查固定格式签名
-        for signature, format_name in self.format_signatures.items():
-            if header.startswith(signature):
-                # WAV格式需要额外验证WAVE标识
-                if format_name == 'wav' and b'WAVE' not in header:
-                    continue
-                return format_name
+    def _format_from_header(self, header: bytes) -> str:
+        """根据已读取的文件头识别格式，无法识别时返回'unknown'"""
+        detected_format = self._identify_format_by_header(header)
         
-        # 检查MP3的其他可能标识
-        if header[0:2] in [b'\xff\xfb', b'\xff\xf3']:
-            return 'mp3'
+        if detected_format:
+            logger.debug("检测到音频格式: %s", detected_format)
+            return detected_format
         
-        return None
+        logger.warning("未知音频格式")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("未知音频格式文件头: %s", header[:10].hex())
+        return 'unknown'
+    
+    def _identify_format_by_header(self, header: bytes) -> Optional[str]:
+        """根据文件头识别格式"""
+        return sniff_format(header)
     
     def is_supported_format(self, format_name: str) -> bool:
         """检查格式是否被STT服务支持"""
-        return format_name in self.config.SUPPORTED_FORMATS
+        return format_name in self._supported_formats
     
     def needs_conversion(self, format_name: str) -> bool:
         """检查是否需要格式转换"""
-        return not self.is_supported_format(format_name) and format_name not in ['invalid', 'unknown']
+        return not self.is_supported_format(format_name) and format_name not in _UNDETECTED_FORMATS
     
     async def get_format_info(self, file_path: str) -> Dict[str, any]:
         """获取音频文件的详细格式信息"""
         try:
-            if not self.validate_file(file_path):
+            # 一次打开文件完成校验、大小获取和格式检测
+            file_size, format_name = await self.inspect_file(file_path)
+            if format_name == 'invalid':
                 raise FileValidationError(f"文件验证失败: {file_path}")
             
-            file_size = os.path.getsize(file_path)
-            
-            # 检测格式
-            format_name = await self.detect_format(file_path)
-            
             return {
                 'file_path': file_path,
                 'file_size': file_size,
@@ -139,27 +229,12 @@ class AudioFormatDetector:
             }
             
         except Exception as e:
-            logger.error(f"获取格式信息失败: {e}")
+            logger.error("获取格式信息失败: %s", e)
             raise AudioFormatError(f"获取音频格式信息失败: {str(e)}") from e
     
     def detect_format_from_extension(self, file_path: str) -> Optional[str]:
         """从文件扩展名推测格式（备用方法）"""
         try:
-            _, ext = os.path.splitext(file_path.lower())
-            ext_to_format = {
-                '.amr': 'amr',
-                '.silk': 'silk', 
-                '.mp3': 'mp3',
-                '.wav': 'wav',
-                '.ogg': 'ogg',
-                '.flac': 'flac',
-                '.m4a': 'm4a',
-                '.mp4': 'mp4',
-                '.mpeg': 'mpeg',
-                '.mpga': 'mpga',
-                '.oga': 'oga',
-                '.webm': 'webm'
-            }
-            return ext_to_format.get(ext)
+            return _EXT_TO_FORMAT.get(os.path.splitext(file_path)[1].lower())
         except Exception:
             return None
@@ -3,7 +3,10 @@
 """
 from abc import ABC, abstractmethod
 import os
+import stat
 import asyncio
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from astrbot.api import logger
 from pydub import AudioSegment
@@ -18,7 +21,7 @@ except ImportError:
     logger.warning("pilk库未安装，SILK格式转换功能将不可用")
 
 from ..config import AudioProcessingConfig
-from ..exceptions import AudioConversionError, FFmpegNotFoundError
+from ..exceptions import AudioConversionError, ConversionTimeoutError, FFmpegNotFoundError
 from ..utils.decorators import async_operation_handler, retry_on_failure
 from .ffmpeg_manager import FFmpegManager
 from .temp_file_manager import TempFileManager
@@ -26,6 +29,58 @@ from ..covert import AudioConverter # 导入 covert.py 中的 AudioConverter
 import os # 确保os模块已导入
 
 
+# 可能因偶发状况失败、值得重试的异常；文件损坏、格式不支持等确定性错误不重试
+_TRANSIENT_ERRORS = (
+    TimeoutError,
+    asyncio.TimeoutError,
+    ConversionTimeoutError,
+    subprocess.CalledProcessError,
+    BlockingIOError,
+    InterruptedError,
+)
+
+
+def _is_transient(error: BaseException) -> bool:
+    """异常本身或其直接原因是否属于可重试的偶发错误，判定方式与 retry_on_failure 一致"""
+    return isinstance(error, _TRANSIENT_ERRORS) or isinstance(error.__cause__, _TRANSIENT_ERRORS)
+
+
+# 转换任务专用线程池的线程数；转换为CPU/子进程密集型任务，不与默认线程池中的文件IO等任务争抢
+_CONVERSION_WORKERS = min(4, os.cpu_count() or 1)
+_conversion_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_conversion_executor() -> ThreadPoolExecutor:
+    """获取转换专用线程池，首次使用时创建"""
+    global _conversion_executor
+    if _conversion_executor is None:
+        _conversion_executor = ThreadPoolExecutor(
+            max_workers=_CONVERSION_WORKERS, thread_name_prefix="voice_convert"
+        )
+    return _conversion_executor
+
+
+async def _run_conversion(func, *args):
+    """在转换专用线程池中执行同步转换函数"""
+    return await asyncio.get_running_loop().run_in_executor(_get_conversion_executor(), func, *args)
+
+
+def shutdown_conversion_executor():
+    """关闭转换专用线程池，插件卸载时调用"""
+    global _conversion_executor
+    if _conversion_executor is not None:
+        _conversion_executor.shutdown(wait=False, cancel_futures=True)
+        _conversion_executor = None
+
+
+def _file_size(file_path: str) -> int:
+    """获取文件大小，文件不存在时返回0"""
+    try:
+        return os.stat(file_path).st_size
+    except OSError:
+        return 0
+
+
 class ConversionStrategy(ABC):
     """音频转换策略抽象基类"""
     
@@ -78,7 +133,6 @@ class PyDubStrategy(ConversionStrategy):
         """检查FFmpeg可用性，带缓存"""
         if not self._check_attempted:
             try:
-                import subprocess
                 result = subprocess.run(['ffprobe', '-version'], 
                                       capture_output=True, timeout=5)
                 self._ffmpeg_available = result.returncode == 0
@@ -94,13 +148,12 @@ class PyDubStrategy(ConversionStrategy):
         return self._ffmpeg_available
     
     @async_operation_handler("PyDub音频转换")
-    @retry_on_failure(max_retries=2)
+    @retry_on_failure(max_retries=2, delay=0.25, max_delay=2.0, retry_on=_TRANSIENT_ERRORS)
     async def convert(self, input_path: str, output_path: str) -> bool:
         """使用PyDub进行转换"""
         try:
             # 在线程池中执行CPU密集型操作
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self._convert_sync, input_path, output_path)
+            await _run_conversion(self._convert_sync, input_path, output_path)
             return True
         except Exception as e:
             # 如果是FFmpeg相关错误，提供更好的错误信息
@@ -148,12 +201,15 @@ class FFmpegStrategy(ConversionStrategy):
         return input_format in supported_formats and output_format in supported_formats
     
     @async_operation_handler("FFmpeg音频转换")
+    @retry_on_failure(max_retries=2, delay=0.25, max_delay=2.0, retry_on=_TRANSIENT_ERRORS)
     async def convert(self, input_path: str, output_path: str) -> bool:
-        """使用FFmpeg进行转换"""
+        """使用FFmpeg进行转换，超时等偶发错误抛出以便重试，其他失败返回False交给下一种策略"""
         try:
             await self.ffmpeg_manager.convert_audio_async(input_path, output_path)
             return True
         except Exception as e:
+            if _is_transient(e):
+                raise
             logger.info(f"FFmpeg转换失败 - 尝试下一种策略: {e}")
             # raise AudioConversionError(f"FFmpeg转换失败: {str(e)}") from e
             return False
@@ -186,14 +242,13 @@ class SilkDecoderExeStrategy(ConversionStrategy):
         return False
     
     @async_operation_handler("silk_v3_decoder.exe音频转换")
-    @retry_on_failure(max_retries=1) # 外部exe调用，重试次数少一点
+    @retry_on_failure(max_retries=1, delay=0.25, max_delay=2.0, retry_on=_TRANSIENT_ERRORS) # 外部exe调用，重试次数少一点
     async def convert(self, input_path: str, output_path: str) -> bool:
         """使用 silk_v3_decoder.exe 进行转换"""
         try:
-            # 直接调用 covert.py 中实现的 _convert_silk_with_exe 方法
-            converted_path = await asyncio.to_thread(
-                self.audio_converter_instance._convert_silk_with_exe, 
-                input_path, 
+            # 异步子进程直接在事件循环中等待，不占用转换线程池
+            converted_path = await self.audio_converter_instance._convert_silk_with_exe_async(
+                input_path,
                 output_path
             )
             return converted_path == output_path
@@ -220,7 +275,7 @@ class SilkStrategy(ConversionStrategy):
         return input_format == 'silk' and output_format == 'mp3'
     
     @async_operation_handler("SILK音频转换 (pilk)")
-    @retry_on_failure(max_retries=2)
+    @retry_on_failure(max_retries=2, delay=0.25, max_delay=2.0, retry_on=_TRANSIENT_ERRORS)
     async def convert(self, input_path: str, output_path: str) -> bool:
         """转换SILK为MP3"""
         try:
@@ -235,8 +290,7 @@ class SilkStrategy(ConversionStrategy):
     
     async def _decode_silk_to_pcm(self, silk_path: str, pcm_path: str):
         """使用pilk解码SILK为PCM"""
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, pilk.decode, silk_path, pcm_path)
+        await _run_conversion(pilk.decode, silk_path, pcm_path)
     
     async def _convert_pcm_to_mp3(self, pcm_path: str, mp3_path: str):
         """将PCM转换为MP3"""
@@ -245,12 +299,7 @@ class SilkStrategy(ConversionStrategy):
         
         for sample_rate in sample_rates:
             try:
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(
-                    None, 
-                    self._pcm_to_mp3_sync, 
-                    pcm_path, mp3_path, sample_rate
-                )
+                await _run_conversion(self._pcm_to_mp3_sync, pcm_path, mp3_path, sample_rate)
                 logger.info(f"SILK转换成功，采样率: {sample_rate}Hz")
                 return
             except Exception as e:
@@ -284,16 +333,18 @@ class FallbackStrategy(ConversionStrategy):
     def _validate_file(self, file_path: str) -> bool:
         """验证文件是否存在且可读 - 来自旧版本"""
         try:
-            if not os.path.exists(file_path):
+            # 一次 stat 同时检查存在性、文件类型和大小
+            try:
+                file_stat = os.stat(file_path)
+            except FileNotFoundError:
                 logger.error(f"文件不存在: {file_path}")
                 return False
 
-            if not os.path.isfile(file_path):
+            if not stat.S_ISREG(file_stat.st_mode):
                 logger.error(f"路径不是文件: {file_path}")
                 return False
 
-            file_size = os.path.getsize(file_path)
-            if file_size == 0:
+            if file_stat.st_size == 0:
                 logger.error(f"文件为空: {file_path}")
                 return False
 
@@ -334,8 +385,8 @@ class FallbackStrategy(ConversionStrategy):
                 logger.info(f"尝试备用方法: {method_name}")
                 await method(input_path, output_path)
                 
-                # 验证输出文件
-                if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+                # 验证输出文件（一次 stat 同时检查存在性和大小）
+                if _file_size(output_path) > 0:
                     logger.info(f"备用方法 '{method_name}' 成功")
                     return True
                 else:
@@ -355,8 +406,7 @@ class FallbackStrategy(ConversionStrategy):
     
     async def _try_generic_format(self, input_path: str, output_path: str):
         """通用格式转换 - 让PyDub自动检测"""
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, self._generic_convert_sync, input_path, output_path)
+        await _run_conversion(self._generic_convert_sync, input_path, output_path)
     
     def _generic_convert_sync(self, input_path: str, output_path: str):
         """同步通用转换"""
@@ -366,8 +416,7 @@ class FallbackStrategy(ConversionStrategy):
     
     async def _try_as_wav(self, input_path: str, output_path: str):
         """尝试作为WAV格式处理"""
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, self._wav_convert_sync, input_path, output_path)
+        await _run_conversion(self._wav_convert_sync, input_path, output_path)
     
     def _wav_convert_sync(self, input_path: str, output_path: str):
         """同步WAV转换"""
@@ -377,8 +426,7 @@ class FallbackStrategy(ConversionStrategy):
     
     async def _try_as_amr(self, input_path: str, output_path: str):
         """尝试作为AMR格式处理"""
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, self._amr_convert_sync, input_path, output_path)
+        await _run_conversion(self._amr_convert_sync, input_path, output_path)
     
     def _amr_convert_sync(self, input_path: str, output_path: str):
         """同步AMR转换"""
@@ -388,8 +436,7 @@ class FallbackStrategy(ConversionStrategy):
     
     async def _try_raw_audio_multi_rates(self, input_path: str, output_path: str):
         """尝试多种采样率的原始音频转换 - 基于旧版本"""
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, self._raw_multi_rates_sync, input_path, output_path)
+        await _run_conversion(self._raw_multi_rates_sync, input_path, output_path)
     
     def _raw_multi_rates_sync(self, input_path: str, output_path: str):
         """同步多采样率原始音频转换"""
@@ -423,8 +470,7 @@ class FallbackStrategy(ConversionStrategy):
     
     async def _try_maximum_compatibility(self, input_path: str, output_path: str):
         """最大兼容性转换 - 最后的尝试"""
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, self._maximum_compatibility_sync, input_path, output_path)
+        await _run_conversion(self._maximum_compatibility_sync, input_path, output_path)
     
     def _maximum_compatibility_sync(self, input_path: str, output_path: str):
         """最大兼容性同步转换"""
@@ -449,45 +495,22 @@ class FallbackStrategy(ConversionStrategy):
                 logger.debug(f"作为{ext}格式处理失败: {e}")
                 continue
         
-        # 方法2: 如果上述都失败，尝试直接复制文件内容并添加简单头部
+        # 方法2: 如果上述都失败，把文件内容当作原始PCM数据处理
         try:
             with open(input_path, 'rb') as src:
                 data = src.read()
             
-            # 创建一个最小的WAV头部，然后转换
-            import struct
-            sample_rate = 8000
-            channels = 1
-            bits_per_sample = 16
-            
-            # 简化的WAV头部
-            wav_header = b'RIFF'
-            wav_header += struct.pack('<I', len(data) + 36)
-            wav_header += b'WAVE'
-            wav_header += b'fmt '
-            wav_header += struct.pack('<I', 16)
-            wav_header += struct.pack('<H', 1)  # PCM
-            wav_header += struct.pack('<H', channels)
-            wav_header += struct.pack('<I', sample_rate)
-            wav_header += struct.pack('<I', sample_rate * channels * bits_per_sample // 8)
-            wav_header += struct.pack('<H', channels * bits_per_sample // 8)
-            wav_header += struct.pack('<H', bits_per_sample)
-            wav_header += b'data'
-            wav_header += struct.pack('<I', len(data))
-            
-            # 创建临时WAV文件
-            temp_wav = input_path + '.temp.wav'
-            with open(temp_wav, 'wb') as f:
-                f.write(wav_header + data)
+            # 直接把数据当作8kHz单声道16bit PCM构造音频，无需拼接WAV头部和写临时文件
+            sample_width = 2
+            audio = AudioSegment(
+                data=data[:len(data) - len(data) % sample_width],
+                sample_width=sample_width,
+                frame_rate=8000,
+                channels=1
+            )
+            audio.export(output_path, format="mp3", bitrate="128k")
+            logger.debug("最大兼容性转换成功，按原始PCM数据处理")
             
-            try:
-                audio = AudioSegment.from_wav(temp_wav)
-                audio.export(output_path, format="mp3", bitrate="128k")
-                logger.debug("最大兼容性转换成功，使用自制WAV头部")
-            finally:
-                if os.path.exists(temp_wav):
-                    os.remove(temp_wav)
-                    
         except Exception as e:
             logger.debug(f"最大兼容性转换失败: {e}")
 
@@ -549,10 +572,11 @@ class ConversionStrategyManager:
                 # 执行转换
                 success = await strategy.convert(input_path, output_path)
                 
-                # 验证转换结果
-                if success and os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+                # 验证转换结果（一次 stat 同时检查存在性和大小）
+                output_size = _file_size(output_path) if success else 0
+                if output_size > 0:
                     logger.info(f"✅ 转换成功: {strategy.strategy_name}")
-                    logger.info(f"输出文件大小: {os.path.getsize(output_path)} bytes")
+                    logger.info(f"输出文件大小: {output_size} bytes")
                     return True
                 else:
                     if success:
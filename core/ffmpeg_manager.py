@@ -2,6 +2,8 @@
 FFmpeg管理器 - 专门管理FFmpeg可执行文件的搜索和调用
 """
 import os
+import glob
+import logging
 import time
 import shutil
 import subprocess
@@ -108,7 +110,6 @@ class FFmpegManager:
         for path in search_paths:
             # 处理通配符路径（如Homebrew的版本化路径）
             if '*' in path:
-                import glob
                 matches = glob.glob(path)
                 for match in matches:
                     if os.path.isfile(match) and os.access(match, os.X_OK):
@@ -206,49 +207,72 @@ class FFmpegManager:
         cmd = self._build_conversion_command(input_path, output_path, format_options)
         
         try:
-            # 使用异步子进程
-            if os.name == 'nt':
-                process = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                    creationflags=subprocess.CREATE_NO_WINDOW
-                )
-            else:
-                process = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-            
-            # 等待进程完成，带超时控制
-            try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(), 
-                    timeout=self.config.CONVERSION_TIMEOUT_SECONDS
-                )
-                
-                if process.returncode != 0:
-                    error_msg = stderr.decode('utf-8', errors='ignore')[:500]
-                    raise subprocess.SubprocessError(f"FFmpeg转换失败: {error_msg}")
-                
-                logger.debug(f"FFmpeg转换成功: {input_path} -> {output_path}")
-                return True
-                
-            except asyncio.TimeoutError:
-                # 超时处理
-                try:
-                    process.terminate()
-                    await asyncio.wait_for(process.wait(), timeout=5.0)
-                except asyncio.TimeoutError:
-                    process.kill()
-                    await process.wait()
-                raise ConversionTimeoutError("FFmpeg转换超时")
-                
+            await self._run_ffmpeg_async(cmd)
+            logger.debug(f"FFmpeg转换成功: {input_path} -> {output_path}")
+            return True
         except Exception as e:
             logger.error(f"FFmpeg异步转换失败: {e}")
             raise
     
+    @async_operation_handler("FFmpeg管道转换")
+    async def convert_audio_to_bytes_async(self, input_path: str, format_options: dict = None) -> bytes:
+        """异步执行FFmpeg转换，结果经stdout管道直接返回，不落盘"""
+        if not self.is_available():
+            raise FFmpegNotFoundError("FFmpeg未安装或无法找到")
+        
+        # 输出到管道时需要显式指定容器格式
+        options = {'f': 'mp3', **(format_options or {})}
+        cmd = self._build_conversion_command(input_path, 'pipe:1', options)
+        
+        try:
+            audio_data = await self._run_ffmpeg_async(cmd)
+            if not audio_data:
+                raise subprocess.SubprocessError("FFmpeg管道输出为空")
+            logger.debug(f"FFmpeg管道转换成功: {input_path} ({len(audio_data)} 字节)")
+            return audio_data
+        except Exception as e:
+            logger.error(f"FFmpeg管道转换失败: {e}")
+            raise
+    
+    async def _run_ffmpeg_async(self, cmd: List[str]) -> bytes:
+        """运行FFmpeg子进程并返回stdout，带超时控制"""
+        # 使用异步子进程
+        if os.name == 'nt':
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                creationflags=subprocess.CREATE_NO_WINDOW
+            )
+        else:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+        
+        # 等待进程完成，带超时控制
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                process.communicate(), 
+                timeout=self.config.CONVERSION_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            # 超时处理
+            try:
+                process.terminate()
+                await asyncio.wait_for(process.wait(), timeout=5.0)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+            raise ConversionTimeoutError("FFmpeg转换超时")
+        
+        if process.returncode != 0:
+            error_msg = stderr.decode('utf-8', errors='ignore')[:500]
+            raise subprocess.SubprocessError(f"FFmpeg转换失败: {error_msg}")
+        
+        return stdout
+    
     def convert_audio_sync(self, input_path: str, output_path: str, 
                           format_options: dict = None) -> bool:
         """同步执行FFmpeg音频转换（向后兼容）"""
@@ -290,7 +314,11 @@ class FFmpegManager:
     def _build_conversion_command(self, input_path: str, output_path: str, 
                                  format_options: dict = None) -> List[str]:
         """构建FFmpeg转换命令"""
-        cmd = [self.ffmpeg_path, '-i', os.path.normpath(input_path)]
+        cmd = [
+            self.ffmpeg_path, '-loglevel', 'error', '-nostdin', '-threads', '1',
+            '-i', os.path.normpath(input_path),
+            '-vn', '-sn', '-dn',  # 只处理音频流，跳过视频/字幕/数据流探测
+        ]
         
         # 默认转换选项
         default_options = {
@@ -307,8 +335,10 @@ class FFmpegManager:
         for key, value in options.items():
             cmd.extend([f'-{key}', str(value)])
         
-        # 添加输出文件和覆盖选项
-        cmd.extend(['-y', os.path.normpath(output_path)])
+        # 添加输出文件和覆盖选项（管道输出不做路径规范化）
+        if output_path != 'pipe:1':
+            output_path = os.path.normpath(output_path)
+        cmd.extend(['-y', output_path])
         
         logger.debug(f"FFmpeg命令: {' '.join(cmd)}")
         return cmd
@@ -351,13 +381,16 @@ class FFmpegManager:
         """输出详细的搜索信息和安装建议"""
         logger.info("FFmpeg搜索详情:")
         logger.info(f"- 操作系统: {os.name}")
-        logger.info(f"- PATH环境变量: {os.environ.get('PATH', 'Not found')}")
         
-        # 检查环境变量
-        env_vars = ['FFMPEG_PATH', 'FFMPEG_BINARY', 'FFMPEG_EXECUTABLE']
-        for env_var in env_vars:
-            value = os.environ.get(env_var)
-            logger.info(f"- {env_var}: {value or '未设置'}")
+        # PATH 和环境变量内容较长，仅在调试级别输出
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("- PATH环境变量: %s", os.environ.get('PATH', 'Not found'))
+            
+            # 检查环境变量
+            env_vars = ['FFMPEG_PATH', 'FFMPEG_BINARY', 'FFMPEG_EXECUTABLE']
+            for env_var in env_vars:
+                value = os.environ.get(env_var)
+                logger.debug("- %s: %s", env_var, value or '未设置')
         
         logger.info("- 建议解决方案:")
         if os.name == 'nt':
@@ -5,6 +5,7 @@ import os
 import time
 import uuid
 import tempfile
+import threading
 from contextlib import contextmanager
 from typing import List, Optional
 from pathlib import Path
@@ -19,6 +20,8 @@ class TempFileManager:
     def __init__(self, config: TempFileConfig = None):
         self.config = config or TempFileConfig()
         self._temp_files: List[str] = []
+        # _temp_files 会在转换线程和后台清理线程中同时修改，修改和复制都需持有该锁
+        self._lock = threading.Lock()
         self._temp_dir: Optional[str] = None
         self._last_cleanup = time.time()
         self._initialize_temp_directory()
@@ -59,7 +62,7 @@ class TempFileManager:
             temp_path = os.path.join(self._temp_dir, filename)
             
             # 记录临时文件
-            self._temp_files.append(temp_path)
+            self._track(temp_path)
             logger.debug(f"创建临时文件: {temp_path}")
             
             yield temp_path
@@ -68,8 +71,7 @@ class TempFileManager:
             # 清理临时文件
             if temp_path:
                 self.cleanup_file(temp_path)
-                if temp_path in self._temp_files:
-                    self._temp_files.remove(temp_path)
+                self._untrack(temp_path)
     
     def create_temp_file(self, extension: str = '.tmp', prefix: str = 'voice_') -> str:
         """创建临时文件（非上下文管理器版本）"""
@@ -80,7 +82,7 @@ class TempFileManager:
         with open(temp_path, 'w') as f:
             pass
         
-        self._temp_files.append(temp_path)
+        self._track(temp_path)
         logger.debug(f"创建临时文件: {temp_path}")
         
         # 检查是否需要清理
@@ -88,6 +90,20 @@ class TempFileManager:
         
         return temp_path
     
+    def _track(self, file_path: str):
+        """记录由本管理器创建的临时文件"""
+        with self._lock:
+            self._temp_files.append(file_path)
+    
+    def _untrack(self, file_path: str) -> bool:
+        """移除临时文件记录，文件不在记录中（已被其他线程移除）时返回False"""
+        with self._lock:
+            try:
+                self._temp_files.remove(file_path)
+            except ValueError:
+                return False
+        return True
+    
     def cleanup_file(self, file_path: str):
         """清理单个临时文件"""
         try:
@@ -99,11 +115,19 @@ class TempFileManager:
     
     def cleanup_all(self):
         """清理所有管理的临时文件"""
-        for file_path in self._temp_files[:]:  # 复制列表以避免修改时的迭代问题
-            self.cleanup_file(file_path)
-            self._temp_files.remove(file_path)
+        with self._lock:
+            file_paths = self._temp_files[:]  # 复制列表以避免修改时的迭代问题
+        for file_path in file_paths:
+            if self._untrack(file_path):
+                self.cleanup_file(file_path)
         logger.info("清理所有临时文件完成")
     
+    def release_files(self, file_paths: List[str]):
+        """清理指定的临时文件，只处理由本管理器创建的文件"""
+        for file_path in file_paths:
+            if self._untrack(file_path):
+                self.cleanup_file(file_path)
+    
     def _check_and_cleanup(self):
         """检查并执行定期清理"""
         current_time = time.time()
@@ -121,18 +145,19 @@ class TempFileManager:
     def _cleanup_old_files(self):
         """清理老旧的临时文件"""
         cleaned_count = 0
-        for file_path in self._temp_files[:]:
+        with self._lock:
+            file_paths = self._temp_files[:]
+        for file_path in file_paths:
             try:
                 if os.path.exists(file_path):
                     # 检查文件创建时间
                     file_age = time.time() - os.path.getctime(file_path)
-                    if file_age > self.config.CLEANUP_INTERVAL_MINUTES * 60:
+                    if file_age > self.config.CLEANUP_INTERVAL_MINUTES * 60 and self._untrack(file_path):
                         self.cleanup_file(file_path)
-                        self._temp_files.remove(file_path)
                         cleaned_count += 1
                 else:
                     # 文件已不存在，从列表中移除
-                    self._temp_files.remove(file_path)
+                    self._untrack(file_path)
             except Exception as e:
                 logger.warning(f"清理老旧文件失败 {file_path}: {e}")
         
@@ -1,9 +1,13 @@
 import os
+import glob
+import stat
+import logging
 import subprocess
 import tempfile
 import shutil
 import asyncio
-from pathlib import Path
+from typing import List
+from functools import lru_cache
 from pydub import AudioSegment
 from astrbot.api import logger
 # import pilk # 根据系统和库可用性动态导入
@@ -50,6 +54,12 @@ class AudioConverter:
         except ImportError:
             logger.warning("pilk库未安装。SILK转换将优先尝试silk_v3_decoder.exe和FFmpeg。")
 
+        # 需要专用转换流程的格式 -> 转换方法，其余格式使用通用转换
+        self._converters = {
+            'amr': self.amr_to_mp3,
+            'silk': self.silk_to_mp3,
+        }
+
     def validate_file(self, file_path: str) -> bool:
         """验证文件是否存在且可读"""
         try:
@@ -83,64 +93,78 @@ class AudioConverter:
     def detect_audio_format(self, file_path: str) -> str:
         """
         检测音频文件格式，增强版本
+
+        检测结果按 (路径, 修改时间, 大小) 缓存，文件未变化时不再重复读取文件头
         """
         try:
-            if not self.validate_file(file_path):
+            st = os.stat(file_path)
+            if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+                # 走完整校验以输出具体的失败原因
+                self.validate_file(file_path)
                 return 'invalid'
 
-            with open(file_path, 'rb') as f:
-                header = f.read(12)
-
-            # 检测文件头 - 更严格的验证
-            if header.startswith(b'#!AMR\n'):
-                logger.info("检测到标准AMR格式")
-                return 'amr'
-            elif header.startswith(b'#!AMR'):
-                logger.info("检测到AMR格式（非标准换行符）")
-                return 'amr'
-            elif header.startswith(b'\x02#!SILK_V3'):
-                logger.info("检测到SILK_V3格式")
-                return 'silk'
-            elif header.startswith(b'ID3') or header[0:2] == b'\xff\xfb' or header[0:2] == b'\xff\xf3':
-                logger.info("检测到MP3格式")
-                return 'mp3'
-            elif header.startswith(b'RIFF') and b'WAVE' in header:
-                logger.info("检测到WAV格式")
-                return 'wav'
-            elif header.startswith(b'OggS'):
-                logger.info("检测到OGG格式")
-                return 'ogg'
-            else:
-                logger.warning(f"未知音频格式，文件头: {header[:10].hex()}")
-                return 'unknown'
+            return self._detect_cached(file_path, st.st_mtime_ns, st.st_size)
 
         except Exception as e:
             logger.error(f"检测音频格式失败: {e}")
             return 'invalid'
 
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _detect_cached(file_path: str, mtime_ns: int, size: int) -> str:
+        """读取文件头识别格式；抛出的异常不会被缓存"""
+        with open(file_path, 'rb') as f:
+            header = f.read(12)
+
+        if len(header) < 5:
+            raise ValueError(f"文件头过短: {file_path}")
+
+        # 检测文件头 - 更严格的验证
+        if header.startswith(b'#!AMR\n'):
+            logger.debug("检测到标准AMR格式")
+            return 'amr'
+        elif header.startswith(b'#!AMR'):
+            logger.debug("检测到AMR格式（非标准换行符）")
+            return 'amr'
+        elif header.startswith(b'\x02#!SILK_V3'):
+            logger.debug("检测到SILK_V3格式")
+            return 'silk'
+        elif header.startswith(b'ID3') or header[0:2] == b'\xff\xfb' or header[0:2] == b'\xff\xf3':
+            logger.debug("检测到MP3格式")
+            return 'mp3'
+        elif header.startswith(b'RIFF') and b'WAVE' in header:
+            logger.debug("检测到WAV格式")
+            return 'wav'
+        elif header.startswith(b'OggS'):
+            logger.debug("检测到OGG格式")
+            return 'ogg'
+        else:
+            logger.warning("未知音频格式")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("未知音频格式文件头: %s", header[:10].hex())
+            return 'unknown'
+
     def amr_to_mp3(self, amr_path: str, output_path: str = None) -> str:
         """
         将AMR文件转换为MP3格式 - 增强错误处理版本
         """
         try:
-            # 验证输入文件
-            if not self.validate_file(amr_path):
-                raise ValueError(f"无效的AMR文件: {amr_path}")
-
-            # 再次验证AMR格式
+            # 验证输入文件并检测格式（检测结果已缓存，从 convert_to_mp3 进入时不会重复读取）
             audio_format = self.detect_audio_format(amr_path)
+            if audio_format == 'invalid':
+                raise ValueError(f"无效的AMR文件: {amr_path}")
             if audio_format not in ['amr', 'unknown']:  # 允许unknown格式尝试转换
                 logger.warning(f"文件格式为 {audio_format}，但仍尝试作为AMR处理")
 
             # 生成输出路径
             if output_path is None:
-                amr_filename = Path(amr_path).stem
+                amr_filename = os.path.splitext(os.path.basename(amr_path))[0]
                 output_path = os.path.join(self.temp_dir, f"{amr_filename}_{os.getpid()}.mp3")
 
             # 确保输出目录存在
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-            logger.info(f"开始AMR转MP3: {amr_path} -> {output_path}")
+            logger.debug("开始AMR转MP3: %s -> %s", amr_path, output_path)
 
             # 尝试多种转换方法
             conversion_methods = [
@@ -152,12 +176,12 @@ class AudioConverter:
             last_error = None
             for i, method in enumerate(conversion_methods, 1):
                 try:
-                    logger.debug(f"尝试转换方法 {i}/{len(conversion_methods)}")
+                    logger.debug("尝试转换方法 %s/%s", i, len(conversion_methods))
                     method(amr_path, output_path)
                     
                     # 验证转换结果
                     if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                        logger.info(f"转换方法 {i} 成功")
+                        logger.debug("转换方法 %s 成功", i)
                         break
                         
                 except Exception as e:
@@ -171,13 +195,9 @@ class AudioConverter:
                             pass
                     continue
             else:
-                # 所有方法都失败了
+                # 所有方法都失败了（只有输出文件有效时才会 break 跳出循环）
                 raise Exception(f"所有AMR转换方法都失败，最后错误: {last_error}")
 
-            # 验证输出文件
-            if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
-                raise Exception("转换后的文件无效")
-
             logger.info(f"AMR转MP3成功: {output_path}")
             return output_path
 
@@ -190,45 +210,42 @@ class AudioConverter:
         智能转换音频文件为MP3格式 - 增强版本
         """
         try:
-            # 首先验证文件
-            if not self.validate_file(input_path):
-                raise ValueError(f"输入文件无效: {input_path}")
-
+            # 格式检测同时完成文件验证，无效文件返回 'invalid'
             audio_format = self.detect_audio_format(input_path)
-            logger.info(f"检测到音频格式: {audio_format}")
+            logger.debug("检测到音频格式: %s", audio_format)
 
             if audio_format == 'invalid':
                 raise ValueError("无法识别的音频格式")
 
             if audio_format == 'mp3':
-                logger.info("文件已是MP3格式，无需转换")
+                logger.debug("文件已是MP3格式，无需转换")
                 return input_path
-            elif audio_format == 'amr':
-                return self.amr_to_mp3(input_path, output_path)
-            elif audio_format == 'silk':
-                return self.silk_to_mp3(input_path, output_path)
-            else:
-                # 使用通用转换方法
-                if output_path is None:
-                    input_filename = Path(input_path).stem
-                    output_path = os.path.join(self.temp_dir, f"{input_filename}_{os.getpid()}.mp3")
-
-                audio = AudioSegment.from_file(input_path)
-                audio.export(output_path, format="mp3", bitrate="128k")
 
-                logger.info(f"通用转换成功: {input_path} -> {output_path}")
-                return output_path
+            converter = self._converters.get(audio_format, self._generic_to_mp3)
+            return converter(input_path, output_path)
 
         except Exception as e:
             logger.error(f"音频转换失败: {e}")
             raise
 
+    def _generic_to_mp3(self, input_path: str, output_path: str = None) -> str:
+        """通用转换方法 - 由pydub/FFmpeg自动识别输入格式"""
+        if output_path is None:
+            input_filename = os.path.splitext(os.path.basename(input_path))[0]
+            output_path = os.path.join(self.temp_dir, f"{input_filename}_{os.getpid()}.mp3")
+
+        audio = AudioSegment.from_file(input_path)
+        audio.export(output_path, format="mp3", bitrate="128k")
+
+        logger.info(f"通用转换成功: {input_path} -> {output_path}")
+        return output_path
+
     def cleanup_temp_files(self, file_path: str):
         """清理临时文件"""
         try:
             if os.path.exists(file_path) and (self.temp_dir in file_path or "temp" in file_path):
                 os.remove(file_path)
-                logger.info(f"清理临时文件: {file_path}")
+                logger.debug("清理临时文件: %s", file_path)
         except Exception as e:
             logger.error(f"清理临时文件失败: {e}")
 
@@ -248,11 +265,11 @@ class AudioConverter:
                 raise FileNotFoundError(f"SILK文件不存在: {silk_path}")
 
             if output_path is None:
-                silk_filename = Path(silk_path).stem
+                silk_filename = os.path.splitext(os.path.basename(silk_path))[0]
                 output_path = os.path.join(self.temp_dir, f"{silk_filename}.mp3")
 
             # 使用FFmpeg直接转换SILK为MP3
-            logger.info(f"开始使用FFmpeg转换SILK格式: {silk_path} -> {output_path}")
+            logger.debug("开始使用FFmpeg转换SILK格式: %s -> %s", silk_path, output_path)
             
             # 定义转换方法列表，优先顺序：silk_v3_decoder.exe (Windows) -> FFmpeg -> pilk (如果可用) -> 其他备用
             conversion_methods = []
@@ -269,12 +286,12 @@ class AudioConverter:
             last_error = None
             for i, method in enumerate(conversion_methods, 1):
                 try:
-                    logger.debug(f"尝试SILK转换方法 {i}/{len(conversion_methods)}")
+                    logger.debug("尝试SILK转换方法 %s/%s", i, len(conversion_methods))
                     converted_path = method(silk_path, output_path)
                     
                     # 验证转换结果
                     if os.path.exists(converted_path) and os.path.getsize(converted_path) > 0:
-                        logger.info(f"SILK转换方法 {i} 成功: {converted_path}")
+                        logger.debug("SILK转换方法 %s 成功: %s", i, converted_path)
                         return converted_path
                         
                 except Exception as e:
@@ -299,7 +316,7 @@ class AudioConverter:
         """使用pydub转换AMR"""
         audio = AudioSegment.from_file(amr_path, format="amr")
         audio.export(output_path, format="mp3", bitrate="128k")
-        logger.info("使用pydub转换成功")
+        logger.debug("使用pydub转换成功")
 
     async def _convert_amr_with_ffmpeg_async(self, amr_path: str, output_path: str):
         """使用FFmpeg异步转换AMR - 真正的异步实现"""
@@ -313,7 +330,9 @@ class AudioConverter:
         output_path = os.path.normpath(output_path)
         
         cmd = [
-            ffmpeg_cmd, '-i', amr_path,
+            ffmpeg_cmd, '-loglevel', 'error', '-nostdin', '-threads', '1',
+            '-i', amr_path,
+            '-vn', '-sn', '-dn',  # 只处理音频流，跳过视频/字幕/数据流探测
             '-acodec', 'libmp3lame',
             '-ab', '128k',
             '-y',  # 覆盖输出文件
@@ -366,7 +385,7 @@ class AudioConverter:
             logger.error(f"异步FFmpeg转换失败: {e}")
             raise
         
-        logger.info(f"使用异步FFmpeg转换成功: {ffmpeg_cmd}")
+        logger.debug("使用异步FFmpeg转换成功: %s", ffmpeg_cmd)
 
     def _convert_amr_with_ffmpeg(self, amr_path: str, output_path: str):
         """使用FFmpeg转换AMR - 同步包装器，保持向后兼容"""
@@ -380,7 +399,9 @@ class AudioConverter:
         output_path = os.path.normpath(output_path)
         
         cmd = [
-            ffmpeg_cmd, '-i', amr_path,
+            ffmpeg_cmd, '-loglevel', 'error', '-nostdin', '-threads', '1',
+            '-i', amr_path,
+            '-vn', '-sn', '-dn',  # 只处理音频流，跳过视频/字幕/数据流探测
             '-acodec', 'libmp3lame',
             '-ab', '128k',
             '-y',  # 覆盖输出文件
@@ -420,7 +441,7 @@ class AudioConverter:
             logger.error(f"FFmpeg转换失败: {e}")
             raise
         
-        logger.info(f"使用FFmpeg转换成功: {ffmpeg_cmd}")
+        logger.debug("使用FFmpeg转换成功: %s", ffmpeg_cmd)
 
     def _convert_amr_with_fallback(self, amr_path: str, output_path: str):
         """备用转换方法 - 尝试作为其他格式处理"""
@@ -428,7 +449,7 @@ class AudioConverter:
             # 尝试作为wav格式读取
             audio = AudioSegment.from_wav(amr_path)
             audio.export(output_path, format="mp3", bitrate="128k")
-            logger.info("使用WAV fallback转换成功")
+            logger.debug("使用WAV fallback转换成功")
         except:
             # 尝试原始音频数据读取
             with open(amr_path, 'rb') as f:
@@ -439,7 +460,7 @@ class AudioConverter:
                     sample_width=2
                 )
                 audio.export(output_path, format="mp3", bitrate="128k")
-                logger.info("使用RAW fallback转换成功")
+                logger.debug("使用RAW fallback转换成功")
 
     async def _convert_silk_with_ffmpeg_async(self, silk_path: str, output_path: str):
         """使用FFmpeg异步转换SILK格式 - 真正的异步实现"""
@@ -454,7 +475,9 @@ class AudioConverter:
         
         # FFmpeg转换SILK的命令
         cmd = [
-            ffmpeg_cmd, '-i', silk_path,
+            ffmpeg_cmd, '-loglevel', 'error', '-nostdin', '-threads', '1',
+            '-i', silk_path,
+            '-vn', '-sn', '-dn',  # 只处理音频流，跳过视频/字幕/数据流探测
             '-acodec', 'libmp3lame',
             '-ar', '24000',  # 设置采样率为24kHz（SILK常用采样率）
             '-ab', '128k',   # 设置比特率
@@ -509,7 +532,7 @@ class AudioConverter:
             logger.error(f"异步FFmpeg转换SILK失败: {e}")
             raise
         
-        logger.info(f"使用异步FFmpeg转换SILK成功: {ffmpeg_cmd}")
+        logger.debug("使用异步FFmpeg转换SILK成功: %s", ffmpeg_cmd)
 
     def _convert_silk_with_ffmpeg(self, silk_path: str, output_path: str):
         """使用FFmpeg转换SILK格式 - 同步包装器，保持向后兼容"""
@@ -524,7 +547,9 @@ class AudioConverter:
         
         # FFmpeg转换SILK的命令
         cmd = [
-            ffmpeg_cmd, '-i', silk_path,
+            ffmpeg_cmd, '-loglevel', 'error', '-nostdin', '-threads', '1',
+            '-i', silk_path,
+            '-vn', '-sn', '-dn',  # 只处理音频流，跳过视频/字幕/数据流探测
             '-acodec', 'libmp3lame',
             '-ar', '24000',  # 设置采样率为24kHz（SILK常用采样率）
             '-ab', '128k',   # 设置比特率
@@ -566,21 +591,12 @@ class AudioConverter:
             logger.error(f"异步FFmpeg转换SILK失败: {e}")
             raise
         
-        logger.info(f"使用FFmpeg转换SILK成功: {ffmpeg_cmd}")
+        logger.debug("使用FFmpeg转换SILK成功: %s", ffmpeg_cmd)
 
     def _convert_silk_fallback(self, silk_path: str, output_path: str) -> str:
         """SILK格式备用转换方法 - 不依赖pilk或特定exe"""
         try:
-            # 方法1: 尝试使用PyDub的通用解码器
-            try:
-                audio = AudioSegment.from_file(silk_path)
-                audio.export(output_path, format="mp3", bitrate="128k")
-                logger.info("使用PyDub通用解码器转换SILK成功")
-                return output_path
-            except Exception as e:
-                logger.debug(f"PyDub通用解码器失败: {e}")
-                
-            # 方法2: 尝试作为原始音频数据处理
+            # 文件头已确认为SILK，PyDub通用解码器(FFmpeg探测)必然失败，直接按原始音频数据处理
             try:
                 # 跳过SILK文件头，尝试解码音频数据
                 with open(silk_path, 'rb') as f:
@@ -602,11 +618,11 @@ class AudioConverter:
                     sample_width=2     # 16位
                 )
                 audio.export(output_path, format="mp3", bitrate="128k")
-                logger.info("使用原始数据方法转换SILK成功")
+                logger.debug("使用原始数据方法转换SILK成功")
                 return output_path
                 
             except Exception as e:
-                logger.debug(f"原始数据方法失败: {e}")
+                logger.debug("原始数据方法失败: %s", e)
                 
             # 如果所有备用方法都失败
             raise Exception("所有SILK备用转换方法都失败")
@@ -624,9 +640,9 @@ class AudioConverter:
             
             try:
                 # 使用pilk解码SILK为PCM
-                logger.info(f"使用pilk解码SILK: {silk_path} -> {pcm_temp}")
+                logger.debug("使用pilk解码SILK: %s -> %s", silk_path, pcm_temp)
                 duration = pilk.decode(silk_path, pcm_temp)
-                logger.info(f"SILK解码成功，音频时长: {duration}ms")
+                logger.debug("SILK解码成功，音频时长: %sms", duration)
                 
                 # 验证PCM文件是否生成
                 if not os.path.exists(pcm_temp) or os.path.getsize(pcm_temp) == 0:
@@ -640,7 +656,7 @@ class AudioConverter:
                 conversion_success = False
                 for sample_rate in sample_rates:
                     try:
-                        logger.info(f"尝试使用采样率 {sample_rate}Hz 转换PCM到MP3")
+                        logger.debug("尝试使用采样率 %sHz 转换PCM到MP3", sample_rate)
                         audio = AudioSegment.from_raw(
                             pcm_temp,
                             frame_rate=sample_rate,
@@ -648,11 +664,11 @@ class AudioConverter:
                             sample_width=2  # 16-bit = 2 bytes
                         )
                         audio.export(output_path, format="mp3", bitrate="128k")
-                        logger.info(f"pilk转换SILK成功: {silk_path} -> {output_path}")
+                        logger.debug("pilk转换SILK成功: %s -> %s", silk_path, output_path)
                         conversion_success = True
                         break
                     except Exception as e:
-                        logger.debug(f"采样率 {sample_rate}Hz 转换失败: {e}")
+                        logger.debug("采样率 %sHz 转换失败: %s", sample_rate, e)
                         continue
                 
                 if not conversion_success:
@@ -665,7 +681,7 @@ class AudioConverter:
                 if os.path.exists(pcm_temp):
                     try:
                         os.remove(pcm_temp)
-                        logger.debug(f"清理临时PCM文件: {pcm_temp}")
+                        logger.debug("清理临时PCM文件: %s", pcm_temp)
                     except Exception as e:
                         logger.warning(f"清理临时PCM文件失败: {e}")
                 
@@ -690,7 +706,7 @@ class AudioConverter:
             
         for cmd in standard_commands:
             if shutil.which(cmd):
-                logger.info(f"在PATH中找到FFmpeg: {shutil.which(cmd)}")
+                logger.debug("在PATH中找到FFmpeg: %s", shutil.which(cmd))
                 return cmd
                 
         logger.debug("未在PATH中找到FFmpeg，尝试搜索常见安装位置...")
@@ -740,15 +756,14 @@ class AudioConverter:
         for path in search_paths:
             # 处理通配符路径（如Homebrew的版本化路径）
             if '*' in path:
-                import glob
                 matches = glob.glob(path)
                 for match in matches:
                     if os.path.isfile(match) and os.access(match, os.X_OK):
-                        logger.info(f"在通配符路径中找到FFmpeg: {match}")
+                        logger.debug("在通配符路径中找到FFmpeg: %s", match)
                         return match
             else:
                 if os.path.isfile(path) and os.access(path, os.X_OK):
-                    logger.info(f"在固定路径中找到FFmpeg: {path}")
+                    logger.debug("在固定路径中找到FFmpeg: %s", path)
                     return path
                     
         # 3. 尝试使用whereis命令（Linux/Mac）
@@ -761,10 +776,10 @@ class AudioConverter:
                     paths = result.stdout.split()[1:]  # 跳过命令名
                     for path in paths:
                         if os.path.isfile(path) and os.access(path, os.X_OK) and 'man' not in path:
-                            logger.info(f"通过whereis找到FFmpeg: {path}")
+                            logger.debug("通过whereis找到FFmpeg: %s", path)
                             return path
             except Exception as e:
-                logger.debug(f"whereis命令失败: {e}")
+                logger.debug("whereis命令失败: %s", e)
                 
         # 4. 尝试使用which命令的变体（适用于某些Docker环境）
         if os.name != 'nt':
@@ -777,10 +792,10 @@ class AudioConverter:
                             paths = result.stdout.strip().split('\n')  # 得到路径列表
                             for path in paths:  # 遍历列表
                                 if os.path.isfile(path) and os.access(path, os.X_OK):  # 正确：逐一检查每个路径
-                                    logger.info(f"通过{which_cmd}找到FFmpeg: {path}")
+                                    logger.debug("通过%s找到FFmpeg: %s", which_cmd, path)
                                     return path 
             except Exception as e:
-                logger.debug(f"which命令搜索失败: {e}")
+                logger.debug("which命令搜索失败: %s", e)
                 
         # 5. 检查环境变量中可能指定的FFmpeg路径
         ffmpeg_env_paths = [
@@ -791,7 +806,7 @@ class AudioConverter:
         
         for env_path in ffmpeg_env_paths:
             if env_path and os.path.isfile(env_path) and os.access(env_path, os.X_OK):
-                logger.info(f"通过环境变量找到FFmpeg: {env_path}")
+                logger.debug("通过环境变量找到FFmpeg: %s", env_path)
                 return env_path
                 
         # 6. 最后尝试递归搜索一些目录（限制深度避免性能问题）
@@ -808,16 +823,17 @@ class AudioConverter:
                             paths = result.stdout.strip().split('\n')  # 得到路径列表
                             for path in paths:  # 遍历列表
                                 if os.path.isfile(path) and os.access(path, os.X_OK):
-                                    logger.info(f"通过递归搜索找到FFmpeg: {path}")
+                                    logger.debug("通过递归搜索找到FFmpeg: %s", path)
                                     return path
                     except Exception as e:
-                        logger.debug(f"递归搜索{search_dir}失败: {e}")
+                        logger.debug("递归搜索%s失败: %s", search_dir, e)
                         continue
         
         logger.error("在所有可能的位置都未找到FFmpeg可执行文件")
         logger.info("FFmpeg搜索详情:")
         logger.info(f"- 操作系统: {os.name}")
-        logger.info(f"- PATH环境变量: {os.environ.get('PATH', 'Not found')}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("- PATH环境变量: %s", os.environ.get('PATH', 'Not found'))
         logger.info("- 建议解决方案:")
         if os.name == 'nt':
             logger.info("  Windows: 从 https://ffmpeg.org/download.html 下载并添加到PATH")
@@ -838,28 +854,31 @@ class AudioConverter:
         current_dir = os.path.dirname(os.path.abspath(__file__))
         decoder_path = os.path.join(current_dir, decoder_name)
         if os.path.isfile(decoder_path) and os.access(decoder_path, os.X_OK):
-            logger.info(f"在当前目录找到 silk_v3_decoder.exe: {decoder_path}")
+            logger.debug("在当前目录找到 silk_v3_decoder.exe: %s", decoder_path)
             return decoder_path
         
         # 其次在项目根目录查找
         project_root = os.path.abspath(os.path.join(current_dir, os.pardir))
         decoder_path = os.path.join(project_root, decoder_name)
         if os.path.isfile(decoder_path) and os.access(decoder_path, os.X_OK):
-            logger.info(f"在项目根目录找到 silk_v3_decoder.exe: {decoder_path}")
+            logger.debug("在项目根目录找到 silk_v3_decoder.exe: %s", decoder_path)
             return decoder_path
 
         # 最后在PATH中查找
         if shutil.which(decoder_name):
-            logger.info(f"在PATH中找到 silk_v3_decoder.exe: {shutil.which(decoder_name)}")
+            logger.debug("在PATH中找到 silk_v3_decoder.exe: %s", shutil.which(decoder_name))
             return shutil.which(decoder_name)
             
         logger.warning(f"未找到 {decoder_name} 可执行文件。请确保它在当前目录、项目根目录或系统PATH中。")
         return None
 
-    def _convert_silk_with_exe(self, silk_path: str, output_mp3_path: str) -> str:
+    def _build_silk_exe_commands(self, silk_path: str, output_mp3_path: str) -> tuple:
         """
-        使用 silk_v3_decoder.exe 将 SILK 转换为 PCM，再用 FFmpeg 转换为 MP3。
+        构建 silk_v3_decoder.exe 解码和 FFmpeg 编码的命令，同步和异步转换共用。
         仅在 Windows 系统下调用。
+
+        Returns:
+            tuple: (SILK转PCM命令, PCM转MP3命令, 临时PCM文件路径)
         """
         if os.name != 'nt':
             raise Exception("此方法仅支持 Windows 系统。")
@@ -868,89 +887,137 @@ class AudioConverter:
         if not silk_decoder_exe:
             raise Exception("未找到 silk_v3_decoder.exe，无法进行转换。")
 
+        ffmpeg_cmd = self._find_ffmpeg_executable()
+        if not ffmpeg_cmd:
+            raise Exception("未找到 FFmpeg 可执行文件，无法将 PCM 转换为 MP3。")
+
         # 生成临时 PCM 文件路径
-        pcm_temp_path = os.path.join(self.temp_dir, f"{Path(silk_path).stem}_{uuid.uuid4().hex}.pcm")
+        pcm_temp_path = os.path.join(self.temp_dir, f"{os.path.splitext(os.path.basename(silk_path))[0]}_{uuid.uuid4().hex}.pcm")
+
+        # usage: silk_v3_decoder.exe in.bit out.pcm [settings]
+        cmd_decode = [
+            silk_decoder_exe,
+            os.path.normpath(silk_path),
+            os.path.normpath(pcm_temp_path),
+            "-Fs_API", "24000" # 假设输出采样率为24000Hz，与pilk保持一致
+        ]
+        cmd_encode = [
+            ffmpeg_cmd,
+            '-f', 's16le',      # 输入格式：有符号16位小端
+            '-ar', '24000',     # 输入采样率：24kHz (与 silk_v3_decoder 输出一致)
+            '-ac', '1',         # 输入声道数：单声道
+            '-i', os.path.normpath(pcm_temp_path),
+            '-acodec', 'libmp3lame',
+            '-ab', '128k',
+            '-y',               # 覆盖输出文件
+            os.path.normpath(output_mp3_path)
+        ]
+        return cmd_decode, cmd_encode, pcm_temp_path
 
-        try:
-            logger.info(f"开始使用 {silk_decoder_exe} 将 SILK 转换为 PCM: {silk_path} -> {pcm_temp_path}")
-            
-            # 调用 silk_v3_decoder.exe
-            # usage: silk_v3_decoder.exe in.bit out.pcm [settings]
-            cmd_decode = [
-                silk_decoder_exe,
-                os.path.normpath(silk_path),
-                os.path.normpath(pcm_temp_path),
-                "-Fs_API", "24000" # 假设输出采样率为24000Hz，与pilk保持一致
-            ]
-            
-            result_decode = subprocess.run(
-                cmd_decode,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                timeout=60.0,
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-
-            if result_decode.returncode != 0:
-                stdout_str = result_decode.stdout.decode('utf-8', errors='ignore')[:1000]
-                stderr_str = result_decode.stderr.decode('utf-8', errors='ignore')[:1000]
-                error_msg = stderr_str or stdout_str or "未知错误"
-                logger.warning(f"silk_v3_decoder.exe 转换失败: {error_msg}")
-                return None # 返回None表示失败，不抛出异常
-            
-            logger.info(f"SILK 转换为 PCM 成功: {pcm_temp_path}")
+    @staticmethod
+    def _check_silk_exe_step(step: str, returncode: int, error_msg: str, output_path: str) -> bool:
+        """检查解码/编码步骤是否成功：进程返回码为0且生成了非空输出文件"""
+        if returncode != 0:
+            logger.warning("%s 失败: %s", step, error_msg)
+            return False
+        if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+            logger.warning("%s 未生成有效的输出文件。", step)
+            return False
+        logger.debug("%s 成功: %s", step, output_path)
+        return True
 
-            # 检查生成的 PCM 文件是否存在且有效
-            if not os.path.exists(pcm_temp_path) or os.path.getsize(pcm_temp_path) == 0:
-                logger.warning("silk_v3_decoder.exe 未生成有效的 PCM 文件。")
-                return None # 返回None表示失败，不抛出异常
+    @staticmethod
+    def _remove_pcm_temp(pcm_temp_path: str):
+        """清理临时 PCM 文件"""
+        if os.path.exists(pcm_temp_path):
+            try:
+                os.remove(pcm_temp_path)
+                logger.debug("清理临时 PCM 文件: %s", pcm_temp_path)
+            except Exception as e:
+                logger.warning("清理临时 PCM 文件失败: %s", e)
 
-            # 使用 FFmpeg 将 PCM 转换为 MP3
-            ffmpeg_cmd = self._find_ffmpeg_executable()
-            if not ffmpeg_cmd:
-                raise Exception("未找到 FFmpeg 可执行文件，无法将 PCM 转换为 MP3。")
+    def _run_decoder_process(self, cmd: List[str], timeout: float = 60.0) -> tuple:
+        """
+        同步运行外部解码/编码进程。仅在 Windows 系统下调用。
 
-            logger.info(f"开始使用 FFmpeg 将 PCM 转换为 MP3: {pcm_temp_path} -> {output_mp3_path}")
-            
-            cmd_encode = [
-                ffmpeg_cmd,
-                '-f', 's16le',      # 输入格式：有符号16位小端
-                '-ar', '24000',     # 输入采样率：24kHz (与 silk_v3_decoder 输出一致)
-                '-ac', '1',         # 输入声道数：单声道
-                '-i', os.path.normpath(pcm_temp_path),
-                '-acodec', 'libmp3lame',
-                '-ab', '128k',
-                '-y',               # 覆盖输出文件
-                os.path.normpath(output_mp3_path)
-            ]
+        Returns:
+            tuple: (返回码, 错误信息)
+        """
+        result = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=timeout,
+            creationflags=subprocess.CREATE_NO_WINDOW
+        )
+        stdout_str = result.stdout.decode('utf-8', errors='ignore')[:1000]
+        stderr_str = result.stderr.decode('utf-8', errors='ignore')[:1000]
+        return result.returncode, stderr_str or stdout_str or "未知错误"
 
-            result_encode = subprocess.run(
-                cmd_encode,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                timeout=60.0,
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-
-            if result_encode.returncode != 0:
-                stdout_str = result_encode.stdout.decode('utf-8', errors='ignore')[:1000]
-                stderr_str = result_encode.stderr.decode('utf-8', errors='ignore')[:1000]
-                error_msg = stderr_str or stdout_str or "未知错误"
-                logger.warning(f"FFmpeg 将 PCM 转换为 MP3 失败: {error_msg}")
+    def _convert_silk_with_exe(self, silk_path: str, output_mp3_path: str) -> str:
+        """
+        使用 silk_v3_decoder.exe 将 SILK 转换为 PCM，再用 FFmpeg 转换为 MP3。
+        仅在 Windows 系统下调用。
+        """
+        cmd_decode, cmd_encode, pcm_temp_path = self._build_silk_exe_commands(silk_path, output_mp3_path)
+        try:
+            if not self._check_silk_exe_step("silk_v3_decoder.exe 将 SILK 转换为 PCM",
+                                             *self._run_decoder_process(cmd_decode), pcm_temp_path):
                 return None # 返回None表示失败，不抛出异常
-
-            logger.info(f"PCM 转换为 MP3 成功: {output_mp3_path}")
+            if not self._check_silk_exe_step("FFmpeg 将 PCM 转换为 MP3",
+                                             *self._run_decoder_process(cmd_encode), output_mp3_path):
+                return None
             return output_mp3_path
+        except Exception as e:
+            logger.warning(f"使用 silk_v3_decoder.exe 转换 SILK 失败: {e}")
+            return None # 返回None表示失败，不抛出异常
+        finally:
+            self._remove_pcm_temp(pcm_temp_path)
+
+    async def _run_decoder_process_async(self, cmd: List[str], timeout: float = 60.0) -> tuple:
+        """
+        异步运行外部解码/编码进程，超时时终止进程。仅在 Windows 系统下调用。
+        
+        Returns:
+            tuple: (返回码, 错误信息)
+        """
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            creationflags=subprocess.CREATE_NO_WINDOW
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            try:
+                process.terminate()
+                await asyncio.wait_for(process.wait(), timeout=5.0)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+            raise Exception(f"外部进程执行超时: {os.path.basename(cmd[0])}")
+        
+        stdout_str = stdout.decode('utf-8', errors='ignore')[:1000] if stdout else ""
+        stderr_str = stderr.decode('utf-8', errors='ignore')[:1000] if stderr else ""
+        return process.returncode, stderr_str or stdout_str or "未知错误"
 
+    async def _convert_silk_with_exe_async(self, silk_path: str, output_mp3_path: str) -> str:
+        """
+        _convert_silk_with_exe 的异步版本 - 直接在事件循环中等待子进程，不占用线程池线程。
+        仅在 Windows 系统下调用。
+        """
+        cmd_decode, cmd_encode, pcm_temp_path = self._build_silk_exe_commands(silk_path, output_mp3_path)
+        try:
+            if not self._check_silk_exe_step("silk_v3_decoder.exe 将 SILK 转换为 PCM",
+                                             *await self._run_decoder_process_async(cmd_decode), pcm_temp_path):
+                return None # 返回None表示失败，不抛出异常
+            if not self._check_silk_exe_step("FFmpeg 将 PCM 转换为 MP3",
+                                             *await self._run_decoder_process_async(cmd_encode), output_mp3_path):
+                return None
+            return output_mp3_path
         except Exception as e:
             logger.warning(f"使用 silk_v3_decoder.exe 转换 SILK 失败: {e}")
-            logger.debug(f"输入路径: {silk_path}, 输出路径: {pcm_temp_path}")  # 添加输入输出路径日志
             return None # 返回None表示失败，不抛出异常
         finally:
-            # 清理临时 PCM 文件
-            if os.path.exists(pcm_temp_path):
-                try:
-                    os.remove(pcm_temp_path)
-                    logger.debug(f"清理临时 PCM 文件: {pcm_temp_path}")
-                except Exception as e:
-                    logger.warning(f"清理临时 PCM 文件失败: {e}")
+            self._remove_pcm_temp(pcm_temp_path)
@@ -3,7 +3,18 @@
 """
 import os
 import time
+import logging
 import json
+import asyncio
+from collections import OrderedDict
+from functools import lru_cache
+
+# 可选使用 orjson 加速对话历史解析，未安装时回退到标准库
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 from astrbot.api.message_components import Record
 from astrbot.api.event import AstrMessageEvent
 from astrbot.api.event import filter
@@ -15,21 +26,100 @@ from astrbot.core.platform.message_type import MessageType
 from .config import PluginConfig
 from .exceptions import VoiceToTextError, STTProviderError
 from .utils.decorators import async_operation_handler
-from .services.voice_processing_service import VoiceProcessingService
-from .services.permission_service import PermissionService
-from .services.stt_service import STTService
+from .utils.metrics import StageMetrics
+
+# 状态命令的输出模板，模块加载时构建一次
+_STATUS_TEMPLATE = """🎙️ 语音转文字插件状态:
+
+📡 STT服务状态:
+- 服务来源: {stt_source}
+- 语音处理: {voice_processing}
+- 服务可用: {stt_available}
+
+🤖 LLM接口状态:
+- 提供商: {llm_provider}
+
+👥 权限状态:
+- 群聊语音识别: {group_recognition}
+- 群聊语音回复: {group_reply}
+
+⚙️ 处理配置:
+- 智能回复: {chat_reply}
+- 控制台输出: {console_output}
+- 最大文件大小: {max_file_size_mb}MB
+- STT缓存: {cache_enabled} ({cache_size}/{cache_max_entries}, 持久化: {cache_persistent})
+- 缓存命中: {cache_hits} 次, 未命中: {cache_misses} 次, 命中率: {cache_hit_rate:.1f}%
+
+⏱️ 阶段耗时:
+{stage_metrics}
+
+🔧 架构信息:
+- 使用重构后的服务层架构
+- 模块化组件设计
+- 统一异常处理
+- 性能优化装饰器
+
+💡 使用方法: 直接发送语音消息即可"""
+
+# 功能测试命令输出末尾的固定内容
+_TEST_FOOTER_LINES = ("", "🏗️ 架构优势:", "- 模块化设计", "- 服务层解耦", "- 统一错误处理", "- 性能优化")
+
+
+@lru_cache(maxsize=1)
+def _build_providers_info() -> str:
+    """构建 voice_providers 命令的输出，提供商信息是静态配置，首次调用时构建并缓存"""
+    # 延迟导入，避免插件加载时引入 stt_providers 及其依赖
+    from .stt_providers import STTProviderConfig, PROVIDER_DISPLAY_CONFIGS
+
+    lines = ["📋 支持的STT提供商:"]
+    for provider_type, display in PROVIDER_DISPLAY_CONFIGS.items():
+        provider_config = STTProviderConfig.get_provider_config(provider_type)
+        lines.extend((
+            "",
+            f"🔹 {display['name']} ({provider_type})",
+            f"- 简介: {display['description']}",
+            f"- 计费: {display['pricing']}",
+            f"- 特点: {'、'.join(display['features'])}",
+            f"- 默认模型: {provider_config['default_model']}",
+        ))
+    lines.extend(("", "💡 在插件配置的 STT_API_Config 中设置 Provider_Type 即可切换提供商"))
+    return "\n".join(lines)
+
+# 开关状态文本，按 bool 索引
+_ON_OFF = ('❌ 禁用', '✅ 启用')
+_YES_NO = ('❌ 否', '✅ 是')
+_CONFIGURED = ('❌ 未配置', '✅ 已配置')
+_CHECK_MARK = ('❌', '✅')
+
+
+def _flag(value, labels: tuple = _ON_OFF) -> str:
+    """按真假取对应的状态文本"""
+    return labels[bool(value)]
+
+# 后台临时文件清理的攒批参数
+_CLEANUP_BATCH_INTERVAL_SECONDS = 2
+_CLEANUP_BATCH_SIZE = 64
+
+# 缓存的LLM提供商句柄有效期，过期后重新解析，使框架中切换的提供商无需 /voice_reload 也能生效
+_PROVIDER_CACHE_TTL_SECONDS = 30
+
+# 已解析对话历史的缓存会话数上限
+_HISTORY_CACHE_SIZE = 128
 
 @register("voice_to_text", "NickMo", "语音转文字智能回复插件", "1.2.2", "")
 class VoiceToTextPlugin(star.Star):
     """重构后的语音转文字插件 - 使用服务层架构"""
 
+    # 默认插件配置，类加载时构建一次
+    _DEFAULT_PLUGIN_CONFIG = PluginConfig.create_default()
+
     def __init__(self, context: Context, config: AstrBotConfig = None) -> None:
         super().__init__(context)
         self.context = context
         self.config = config or {}
         
-        # 初始化插件配置
-        self.plugin_config = PluginConfig.create_default()
+        # 初始化插件配置（默认配置不可变，所有实例共享）
+        self.plugin_config = self._DEFAULT_PLUGIN_CONFIG
         
         # 基础配置
         chat_reply_settings = self.config.get("Chat_Reply", {})
@@ -37,10 +127,26 @@ class VoiceToTextPlugin(star.Star):
         self.console_output = self.config.get("Output_Settings", {}).get("Console_Output", True) # 修正console_output的获取路径
         
         # 权限服务
-        logger.info(f"回复配置: {self.enable_chat_reply}")
-        logger.info(f"输出配置: {self.console_output}")
+        logger.info("回复配置: %s", self.enable_chat_reply)
+        logger.info("输出配置: %s", self.console_output)
+
+        # 缓存的LLM提供商句柄
+        self._llm_provider = None
+        self._llm_provider_name = None
+        self._llm_provider_resolved_at = 0.0
+        
+        # 各处理阶段耗时统计
+        self._metrics = StageMetrics()
 
+        # 已解析的对话历史: (unified_msg_origin, 对话ID) -> (历史JSON, 解析结果)
+        self._history_cache = OrderedDict()
+        
+        # 后台清理任务，首次需要时在事件循环中启动
+        self._cleanup_queue = None
+        self._cleanup_task = None
+        
         # 初始化服务层
+        self._services_ready = False
         self._initialize_services()
         
         logger.info("重构版语音转文字插件初始化完成")
@@ -48,6 +154,12 @@ class VoiceToTextPlugin(star.Star):
     def _initialize_services(self):
         """初始化所有服务层组件"""
         try:
+            # 延迟导入服务层，缩短框架加载插件模块的时间
+            from .services.voice_processing_service import VoiceProcessingService
+            from .services.permission_service import PermissionService
+            from .services.stt_service import STTService
+            from .services.stt_cache_service import STTCacheService
+            
             # 初始化权限服务
             self.permission_service = PermissionService(self.config)
             
@@ -57,115 +169,265 @@ class VoiceToTextPlugin(star.Star):
             # 初始化STT服务
             self.stt_service = STTService(self.config, self.context)
             
+            # 初始化STT结果缓存服务
+            self.stt_cache_service = STTCacheService(self.config)
+            
+            # 语音处理并发上限，限制同时进行的文件获取和格式转换（ffmpeg子进程）数量
+            processing_config = self.config.get("Processing_Config", {})
+            max_voices = processing_config.get("Max_Concurrent_Voices", 4)
+            self._voice_semaphore = asyncio.Semaphore(max(1, int(max_voices)))
+            
+            # 进行中的STT请求: 音频哈希 -> Future，用于合并并发的重复请求
+            self._inflight_transcriptions = {}
+            
+            self._services_ready = True
             logger.info("所有服务层组件初始化完成")
             
+            # 在后台预热STT服务，避免首条语音承担初始化开销
+            try:
+                asyncio.get_running_loop().create_task(self.stt_service.warm_up())
+            except RuntimeError:
+                logger.debug("当前无运行中的事件循环，跳过STT预热")
+            
         except Exception as e:
-            logger.error(f"服务层初始化失败: {e}")
+            logger.error("服务层初始化失败: %s", e)
             raise VoiceToTextError(f"插件初始化失败: {str(e)}") from e
     
     @filter.event_message_type(filter.EventMessageType.ALL)
     async def on_message(self, event: AstrMessageEvent, context=None):
         """监听所有消息，处理语音消息 - 重构版本"""
         # 使用框架提供的 API 方法获取消息链，而不是直接访问内部属性
-        messages = event.get_messages()
-        for comp in messages:
-            if isinstance(comp, Record):
-                # 检查权限
-                if await self.permission_service.can_process_voice(event):
-                    async for result in self._process_voice_message(event, comp):
-                        yield result
-                else:
-                    logger.debug(f"权限检查未通过，跳过语音处理: {event.get_group_id()}")
+        # 绝大多数消息不含语音，一次扫描取出语音组件，没有则直接返回，不进入权限检查
+        voice = next((comp for comp in event.get_messages() if type(comp) is Record), None)
+        if voice is None:
+            return
+        
+        # 检查权限（每条消息只检查一次，识别与回复权限一并判定）
+        can_process, can_reply = self.permission_service.check_permissions(event)
+        if can_process:
+            async for result in self._process_voice_message(event, voice, can_reply):
+                yield result
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug("权限检查未通过，跳过语音处理: %s", event.get_group_id())
     
     @async_operation_handler("语音消息处理")
-    async def _process_voice_message(self, event: AstrMessageEvent, voice: Record):
-        """处理语音消息的完整流程 - 重构版本"""
+    async def _process_voice_message(self, event: AstrMessageEvent, voice: Record, can_reply: bool):
+        """处理语音消息的完整流程 - 重构版本
+
+        Args:
+            event: 消息事件
+            voice: 语音组件
+            can_reply: 是否有智能回复权限，由 on_message 的权限检查得出
+        """
         try:
-            logger.info(f"收到来自 {event.get_sender_name()} 的语音消息")
-            
-            # 1. 语音文件处理
-            processed_file_path = await self._process_voice_file(voice)
-            if not processed_file_path:
-                return
+            logger.info("收到来自 %s 的语音消息", event.get_sender_name())
             
-            # 2. 语音识别
-            transcribed_text = await self._transcribe_voice(processed_file_path)
+            # 1-4. 获取语音文件并识别
+            transcribed_text = await self._voice_to_text(voice)
             if not transcribed_text:
                 return
             
-            # 3. 输出识别结果
+            # 5. 输出识别结果
             if self.console_output:
-                logger.info(f"语音识别结果: {transcribed_text}")
+                logger.info("语音识别结果: %s", transcribed_text)
             
-            await self._record_voice_to_history(event, transcribed_text)
-            logger.info(f"群聊语音已记录到历史: {event.get_group_id()}")
+            with self._metrics.measure('记录历史'):
+                await self._record_voice_to_history(event, transcribed_text)
 
-            # 4. 处理群聊语音记录
+            # 6. 处理群聊语音记录
             # 如果是群聊消息且开启了群聊语音识别，将语音内容记录到历史中但不回复
-            if (event.get_message_type() == MessageType.GROUP_MESSAGE and 
+            if (event.get_message_type() is MessageType.GROUP_MESSAGE and 
                 self.permission_service.enable_group_voice_recognition and
-                self.permission_service.enable_group_voice_reply is False and
-                await self.permission_service.can_process_voice(event)):
+                self.permission_service.enable_group_voice_reply is False):
                 
                 # 阻止后续的 LLM 回复
                 event.stop_event()
-                logger.info(f"由于没有开启群聊回复或者是群聊不在回复名单内，所以进行事件阻断，阻止后续的LLM回复，群号为: {event.get_group_id()}")
+                logger.info("由于没有开启群聊回复或者是群聊不在回复名单内，所以进行事件阻断，阻止后续的LLM回复，群号为: %s", event.get_group_id())
                 return
             
-            # 5. 生成智能回复（仅对私聊或未开启群聊语音识别的情况）
-            if self.enable_chat_reply and await self.permission_service.can_generate_reply(event):
+            # 7. 生成智能回复（仅对私聊或未开启群聊语音识别的情况）
+            if self.enable_chat_reply and can_reply:
                 async for reply in self._generate_intelligent_reply(event, transcribed_text):
                     yield reply
                     
         except VoiceToTextError as e:
-            logger.error(f"语音处理业务逻辑错误: {e}")
+            logger.error("语音处理业务逻辑错误: %s", e)
         except Exception as e:
-            logger.error(f"语音处理未知错误: {e}")
-        finally:
-            # 清理资源
-            await self._cleanup_resources()
+            logger.error("语音处理未知错误: %s", e)
     
-    async def _process_voice_file(self, voice: Record) -> str:
-        """处理语音文件"""
+    async def _voice_to_text(self, voice: Record) -> str:
+        """获取语音文件并转为文字，失败时返回None"""
+        # 1. 获取并校验语音文件，超出并发上限的语音排队等待
+        with self._metrics.measure('语音文件处理'):
+            async with self._voice_semaphore:
+                original_file_path, input_format = await self._resolve_voice_file(voice)
+        if not original_file_path:
+            return None
+        
+        # 2. 按识别引擎和原始音频内容查询识别缓存，命中时连格式转换一起跳过
+        cache_key = await self.stt_cache_service.compute_key(
+            original_file_path, self.stt_service.get_engine_signature()
+        )
+        transcribed_text = await self._get_cached_transcription(cache_key)
+        if transcribed_text is not None:
+            return transcribed_text
+        
+        # 3-4. 格式转换与语音识别，相同音频的并发请求合并为一次
+        return await self._transcribe_voice(original_file_path, cache_key, input_format)
+    
+    async def _resolve_voice_file(self, voice: Record) -> tuple:
+        """获取并校验原始语音文件，返回 (文件路径, 音频格式)，失败时返回 (None, None)"""
+        try:
+            return await self.voice_processing_service.resolve_voice_file(voice)
+        except Exception as e:
+            logger.error("语音文件处理失败: %s", e)
+            return None, None
+    
+    async def _prepare_voice_file(self, original_file_path: str, input_format: str = None) -> str:
+        """将语音文件转换为STT支持的格式"""
         try:
-            return await self.voice_processing_service.process_voice_file(voice)
+            return await self.voice_processing_service.prepare_for_stt(original_file_path, input_format)
         except Exception as e:
-            logger.error(f"语音文件处理失败: {e}")
+            logger.error("语音文件格式转换失败: %s", e)
             return None
     
-    async def _transcribe_voice(self, audio_file_path: str) -> str:
-        """语音转文字"""
+    async def _get_cached_transcription(self, cache_key: str) -> str:
+        """查询识别结果缓存，未命中返回None"""
+        if not cache_key:
+            return None
         try:
-            return await self.stt_service.transcribe_audio(audio_file_path)
+            cached_text = await self.stt_cache_service.get(cache_key)
+        except Exception as e:
+            logger.warning("查询STT缓存失败: %s", e)
+            return None
+        if cached_text is not None:
+            logger.info("STT缓存命中，跳过格式转换和语音识别")
+        return cached_text
+    
+    async def _transcribe_voice(self, original_file_path: str, cache_key: str = None,
+                                input_format: str = None) -> str:
+        """语音转文字（含格式转换）
+
+        Args:
+            original_file_path: 原始语音文件路径
+            cache_key: 原始音频的内容哈希，用于合并重复请求和写入缓存
+            input_format: 已检测出的音频格式
+        """
+        in_flight = None
+        try:
+            if cache_key:
+                # 相同音频正在识别时，等待已有请求的结果而不是重复调用
+                pending = self._inflight_transcriptions.get(cache_key)
+                if pending is not None:
+                    logger.info("相同语音正在识别中，复用进行中的请求")
+                    return await asyncio.shield(pending)
+                in_flight = asyncio.get_running_loop().create_future()
+                self._inflight_transcriptions[cache_key] = in_flight
+            
+            text = await self._convert_and_transcribe(original_file_path, input_format)
+            if cache_key and text:
+                await self.stt_cache_service.put(cache_key, text)
+            if in_flight is not None:
+                in_flight.set_result(text)
+            return text
         except STTProviderError as e:
-            logger.error(f"STT服务错误: {e}")
+            logger.error("STT服务错误: %s", e)
             return None
         except Exception as e:
-            logger.error(f"语音识别失败: {e}")
+            logger.error("语音识别失败: %s", e)
             return None
+        finally:
+            if in_flight is not None:
+                # 失败或被取消时，让等待中的请求同样得到空结果
+                if not in_flight.done():
+                    in_flight.set_result(None)
+                self._inflight_transcriptions.pop(cache_key, None)
+    
+    async def _convert_and_transcribe(self, original_file_path: str, input_format: str = None) -> str:
+        """格式转换后调用STT，转换产生的临时文件交给后台清理"""
+        # 插件STT在格式转换期间预先建立HTTP连接，转换完成后直接复用
+        warm_task = (
+            asyncio.create_task(self.stt_service.ensure_connected())
+            if self.stt_service.stt_source == "plugin" else None
+        )
+        
+        processed_file_path = None
+        try:
+            # STT支持直接接收音频数据时，FFmpeg输出经管道直接送入STT，不落盘
+            if self.stt_service.accepts_audio_bytes:
+                with self._metrics.measure('格式转换'):
+                    async with self._voice_semaphore:
+                        audio_data = await self.voice_processing_service.prepare_bytes_for_stt(
+                            original_file_path, input_format
+                        )
+                if audio_data:
+                    if warm_task:
+                        await warm_task
+                    with self._metrics.measure('语音识别'):
+                        return await self.stt_service.submit_audio_bytes(audio_data)
+            
+            with self._metrics.measure('格式转换'):
+                async with self._voice_semaphore:
+                    processed_file_path = await self._prepare_voice_file(original_file_path, input_format)
+            if not processed_file_path:
+                return None
+            
+            if warm_task:
+                await warm_task
+            
+            # STT服务内部限制同时进行的调用数，超出的请求排队等待
+            with self._metrics.measure('语音识别'):
+                return await self.stt_service.submit_transcription(processed_file_path)
+        finally:
+            # 转换失败提前返回或抛出异常时，不再需要预热连接
+            if warm_task and not warm_task.done():
+                warm_task.cancel()
+            # 交给后台任务批量清理本次产生的临时文件，不占用响应路径
+            if processed_file_path and processed_file_path != original_file_path:
+                self._schedule_cleanup(processed_file_path)
+    
+    def _get_llm_provider(self):
+        """获取LLM提供商，解析结果在有效期内缓存在实例上，也可通过 /voice_reload 立即刷新"""
+        now = time.monotonic()
+        if self._llm_provider is None or now - self._llm_provider_resolved_at >= _PROVIDER_CACHE_TTL_SECONDS:
+            self._llm_provider = self.context.get_using_provider()
+            self._llm_provider_resolved_at = now
+            # 展示名随句柄一并缓存，避免每条消息重复计算
+            self._llm_provider_name = type(self._llm_provider).__name__ if self._llm_provider else None
+        return self._llm_provider
+    
+    async def _get_conversation(self, event: AstrMessageEvent) -> tuple:
+        """获取当前对话ID和对话对象，失败时返回 (None, None)"""
+        try:
+            conv_manager = self.context.conversation_manager
+            unified_msg_origin = event.unified_msg_origin
+            curr_cid = await conv_manager.get_curr_conversation_id(unified_msg_origin)
+            conversation = None
+            if curr_cid:
+                conversation = await conv_manager.get_conversation(unified_msg_origin, curr_cid)
+            return curr_cid, conversation
+        except Exception as e:
+            logger.debug("获取对话上下文失败: %s", e)
+            return None, None
     
     async def _generate_intelligent_reply(self, event: AstrMessageEvent, text: str):
-        """生成智能回复"""
+        """生成智能回复
+
+        对话在语音记录写入历史之后获取，传给LLM的历史包含刚记录的语音消息，
+        框架保存本轮对话时不会覆盖该记录
+        """
         try:
             # 获取LLM提供商
-            llm_provider = self.context.get_using_provider()
+            llm_provider = self._get_llm_provider()
             if not llm_provider:
                 logger.error("未配置LLM提供商，无法生成智能回复")
                 return
             
-            logger.info(f"使用LLM提供商: {type(llm_provider).__name__}")
+            logger.debug("使用LLM提供商: %s", self._llm_provider_name)
             logger.info("正在生成智能回复...")
             
             # 获取对话上下文
-            curr_cid = await self.context.conversation_manager.get_curr_conversation_id(
-                event.unified_msg_origin
-            )
-            conversation = None
-            
-            if curr_cid:
-                conversation = await self.context.conversation_manager.get_conversation(
-                    event.unified_msg_origin, curr_cid
-                )
+            curr_cid, conversation = await self._get_conversation(event)
             
             # 构造提示词
             prompt = f"用户通过语音说了: {text}"
@@ -178,11 +440,14 @@ class VoiceToTextPlugin(star.Star):
             )
             
         except Exception as e:
-            logger.error(f"生成智能回复失败: {e}")
+            logger.error("生成智能回复失败: %s", e)
     
     # Feat: 将语音转换的文本记录到对话历史中，但不生成回复
     async def _record_voice_to_history(self, event: AstrMessageEvent, transcribed_text: str):
-        """将语音转换的文本记录到对话历史中，但不生成回复"""
+        """将语音转换的文本记录到对话历史中，但不生成回复
+
+        对话在追加前获取，避免覆盖识别期间写入的消息
+        """
         try:
             # 获取 ConversationManager 实例
             conv_manager = self.context.conversation_manager
@@ -197,7 +462,7 @@ class VoiceToTextPlugin(star.Star):
             
             # 获取当前对话历史
             conversation = await conv_manager.get_conversation(unified_msg_origin, conversation_id)
-            current_history = json.loads(conversation.history) if conversation and conversation.history else []
+            current_history = self._load_history(unified_msg_origin, conversation_id, conversation)
             
             # 构造语音消息记录
             voice_message = {
@@ -209,17 +474,73 @@ class VoiceToTextPlugin(star.Star):
             # 更新对话历史
             await conv_manager.update_conversation(unified_msg_origin, conversation_id, current_history)
             
-            logger.info(f"语音消息已记录到历史: {transcribed_text[:50]}...")
+            logger.info("语音消息已记录到历史: %s...", transcribed_text[:50])
             
         except Exception as e:
-            logger.error(f"记录语音到历史失败: {e}")
+            logger.error("记录语音到历史失败: %s", e)
+    
+    def _load_history(self, unified_msg_origin: str, conversation_id: str, conversation) -> list:
+        """解析对话历史，历史内容未变化时复用上次的解析结果"""
+        history = conversation.history if conversation else None
+        if not history:
+            return []
+
+        key = (unified_msg_origin, conversation_id)
+        cached = self._history_cache.get(key)
+        if cached is not None and cached[0] == history:
+            self._history_cache.move_to_end(key)
+            # 返回副本，调用方追加消息不会污染缓存
+            return list(cached[1])
+
+        parsed = _json_loads(history)
+        self._store_history(unified_msg_origin, conversation_id, history, parsed)
+        return list(parsed)
+
+    def _store_history(self, unified_msg_origin: str, conversation_id: str, history: str, parsed: list):
+        """记录对话历史的解析结果"""
+        key = (unified_msg_origin, conversation_id)
+        self._history_cache[key] = (history, list(parsed))
+        self._history_cache.move_to_end(key)
+        if len(self._history_cache) > _HISTORY_CACHE_SIZE:
+            self._history_cache.popitem(last=False)
+
+    def _schedule_cleanup(self, file_path: str):
+        """将临时文件加入后台清理队列"""
+        if self._cleanup_task is None or self._cleanup_task.done():
+            self._cleanup_queue = asyncio.Queue()
+            self._cleanup_task = asyncio.create_task(self._cleanup_worker())
+        self._cleanup_queue.put_nowait(file_path)
+    
+    async def _cleanup_worker(self):
+        """后台清理任务 - 攒批后统一清理临时文件，收到 None 时退出"""
+        queue = self._cleanup_queue
+        stopping = False
+        while not stopping:
+            file_path = await queue.get()
+            if file_path is None:
+                break
+            
+            # 等待一小段时间，让突发的语音消息合并为一批
+            await asyncio.sleep(_CLEANUP_BATCH_INTERVAL_SECONDS)
+            batch = [file_path]
+            while len(batch) < _CLEANUP_BATCH_SIZE and not queue.empty():
+                file_path = queue.get_nowait()
+                if file_path is None:
+                    stopping = True
+                    break
+                batch.append(file_path)
+            
+            try:
+                await asyncio.to_thread(self.voice_processing_service.cleanup_resources, batch)
+            except Exception as e:
+                logger.warning("后台资源清理失败: %s", e)
     
     async def _cleanup_resources(self):
         """清理资源"""
         try:
             self.voice_processing_service.cleanup_resources()
         except Exception as e:
-            logger.warning(f"资源清理失败: {e}")
+            logger.warning("资源清理失败: %s", e)
     
     @filter.command("voice_status")
     async def voice_status_command(self, event: AstrMessageEvent):
@@ -229,39 +550,37 @@ class VoiceToTextPlugin(star.Star):
             stt_status = self.stt_service.get_stt_status()
             permission_status = await self.permission_service.get_permission_status(event.get_group_id())
             processing_status = self.voice_processing_service.get_processing_status()
+            cache_status = self.stt_cache_service.get_cache_status()
+            stt_available = self.stt_service.is_available()
             
             # 构建状态信息
-            status_info = f"""🎙️ 语音转文字插件状态:
-
-                📡 STT服务状态:
-                - 服务来源: {stt_status.get('stt_source', '未知')}
-                - 语音处理: {'✅ 启用' if stt_status.get('voice_processing_enabled') else '❌ 禁用'}
-                - 服务可用: {'✅ 是' if self.stt_service.is_available() else '❌ 否'}
-
-                🤖 LLM接口状态:
-                - 提供商: {'✅ 已配置' if self.context.get_using_provider() else '❌ 未配置'}
-
-                👥 权限状态:
-                - 群聊语音识别: {'✅ 启用' if permission_status.get('group_voice_recognition_enabled') else '❌ 禁用'}
-                - 群聊语音回复: {'✅ 启用' if permission_status.get('group_voice_reply_enabled') else '❌ 禁用'}
-
-                ⚙️ 处理配置:
-                - 智能回复: {'✅ 启用' if self.enable_chat_reply else '❌ 禁用'}
-                - 控制台输出: {'✅ 启用' if self.console_output else '❌ 禁用'}
-                - 最大文件大小: {processing_status['config']['max_file_size_mb']}MB
-
-                🔧 架构信息:
-                - 使用重构后的服务层架构
-                - 模块化组件设计
-                - 统一异常处理
-                - 性能优化装饰器
-
-                💡 使用方法: 直接发送语音消息即可"""
+            status_values = {
+                'stt_source': stt_status.get('stt_source', '未知'),
+                'voice_processing': _flag(stt_status.get('voice_processing_enabled')),
+                'stt_available': _flag(stt_available, _YES_NO),
+                'llm_provider': _flag(self._get_llm_provider(), _CONFIGURED),
+                'group_recognition': _flag(permission_status.get('group_voice_recognition_enabled')),
+                'group_reply': _flag(permission_status.get('group_voice_reply_enabled')),
+                'chat_reply': _flag(self.enable_chat_reply),
+                'console_output': _flag(self.console_output),
+                'max_file_size_mb': processing_status['config']['max_file_size_mb'],
+                'cache_enabled': _flag(cache_status['enabled']),
+                'cache_size': cache_status['size'],
+                'cache_max_entries': cache_status['max_entries'],
+                'cache_persistent': _flag(cache_status['persistent'], _CHECK_MARK),
+                'cache_hits': cache_status['hits'],
+                'cache_misses': cache_status['misses'],
+                'cache_hit_rate': cache_status['hit_rate'],
+                'stage_metrics': "\n".join(
+                    f"- {stage}: p50 {stats['p50_ms']:.0f}ms, p95 {stats['p95_ms']:.0f}ms ({stats['count']} 次)"
+                    for stage, stats in self._metrics.summary().items()
+                ) or "- 暂无数据",
+            }
 
-            yield event.plain_result(status_info.strip())
+            yield event.plain_result(_STATUS_TEMPLATE.format_map(status_values))
             
         except Exception as e:
-            logger.error(f"获取状态信息失败: {e}")
+            logger.error("获取状态信息失败: %s", e)
             yield event.plain_result(f"状态查询失败: {str(e)}")
     
     @filter.command("voice_test")
@@ -270,7 +589,7 @@ class VoiceToTextPlugin(star.Star):
         try:
             logger.info("🔍 正在测试重构版插件功能...")
             
-            test_results = []
+            test_results = ["🧪 重构版插件功能测试结果:", ""]
             
             # 测试STT服务
             if self.stt_service.is_available():
@@ -279,9 +598,9 @@ class VoiceToTextPlugin(star.Star):
                 test_results.append("❌ STT服务不可用")
             
             # 测试LLM服务
-            llm_provider = self.context.get_using_provider()
+            llm_provider = self._get_llm_provider()
             if llm_provider:
-                test_results.append(f"✅ LLM服务可用: {type(llm_provider).__name__}")
+                test_results.append(f"✅ LLM服务可用: {self._llm_provider_name}")
             else:
                 test_results.append("❌ LLM服务不可用")
             
@@ -295,63 +614,98 @@ class VoiceToTextPlugin(star.Star):
             # 测试权限服务
             group_id = event.get_group_id()
             if group_id:
-                can_process = await self.permission_service.can_process_voice(event)
-                can_reply = await self.permission_service.can_generate_reply(event)
+                can_process, can_reply = self.permission_service.check_permissions(event)
                 test_results.append(f"✅ 权限检查: 识别={can_process}, 回复={can_reply}")
             else:
                 test_results.append("✅ 权限检查: 私聊消息")
             
-            result_text = "🧪 重构版插件功能测试结果:\n\n" + "\n".join(test_results)
-            result_text += "\n\n🏗️ 架构优势:\n- 模块化设计\n- 服务层解耦\n- 统一错误处理\n- 性能优化"
+            test_results.extend(_TEST_FOOTER_LINES)
             
-            yield event.plain_result(result_text)
+            yield event.plain_result("\n".join(test_results))
             
         except Exception as e:
-            logger.error(f"功能测试失败: {e}")
+            logger.error("功能测试失败: %s", e)
             yield event.plain_result(f"测试失败: {str(e)}")
     
+    @filter.command("voice_providers")
+    async def voice_providers_command(self, event: AstrMessageEvent):
+        """查看所有支持的STT提供商"""
+        yield event.plain_result(_build_providers_info())
+    
     @filter.command("voice_debug")
     async def voice_debug_command(self, event: AstrMessageEvent):
         """调试信息 - 重构版本"""
         try:
             group_id = event.get_group_id()
-            
-            debug_info = f"""🔍 插件调试信息:
-
-                📱 消息信息:
-                - 消息类型: {event.get_message_type()}
-                - 群聊ID: {group_id or '私聊'}
-                - 发送者: {event.get_sender_name()}
-
-                🏗️ 架构状态:
-                - 服务层初始化: ✅ 完成
-                - 权限服务: {'✅ 正常' if hasattr(self, 'permission_service') else '❌ 异常'}
-                - 语音处理服务: {'✅ 正常' if hasattr(self, 'voice_processing_service') else '❌ 异常'}
-                - STT服务: {'✅ 正常' if hasattr(self, 'stt_service') else '❌ 异常'}
-
-                📊 服务详情:
-                - STT源: {self.stt_service.stt_source if hasattr(self, 'stt_service') else '未知'}
-                - 权限状态: {await self.permission_service.get_permission_status(group_id) if hasattr(self, 'permission_service') else '未知'}
-
-                🔧 重构改进:
-                - ✅ 单一职责原则
-                - ✅ 依赖注入
-                - ✅ 服务层架构
-                - ✅ 统一异常处理
-                - ✅ 性能优化装饰器
-                - ✅ 配置统一管理"""
+            services_ready = self._services_ready
+            stt_source = self.stt_service.stt_source if services_ready else '未知'
+            permission_status = (
+                await self.permission_service.get_permission_status(group_id) if services_ready else '未知'
+            )
+            service_state = '✅ 正常' if services_ready else '❌ 异常'
+            
+            debug_info = "\n".join([
+                "🔍 插件调试信息:",
+                "",
+                "📱 消息信息:",
+                f"- 消息类型: {event.get_message_type()}",
+                f"- 群聊ID: {group_id or '私聊'}",
+                f"- 发送者: {event.get_sender_name()}",
+                "",
+                "🏗️ 架构状态:",
+                "- 服务层初始化: ✅ 完成",
+                f"- 权限服务: {service_state}",
+                f"- 语音处理服务: {service_state}",
+                f"- STT服务: {service_state}",
+                "",
+                "📊 服务详情:",
+                f"- STT源: {stt_source}",
+                f"- 权限状态: {permission_status}",
+                "",
+                "🔧 重构改进:",
+                "- ✅ 单一职责原则",
+                "- ✅ 依赖注入",
+                "- ✅ 服务层架构",
+                "- ✅ 统一异常处理",
+                "- ✅ 性能优化装饰器",
+                "- ✅ 配置统一管理",
+            ])
 
-            yield event.plain_result(debug_info.strip())
+            yield event.plain_result(debug_info)
             
         except Exception as e:
-            logger.error(f"调试命令失败: {e}")
+            logger.error("调试命令失败: %s", e)
             yield event.plain_result(f"调试失败: {str(e)}")
     
     
+    @filter.command("voice_reload")
+    async def voice_reload_command(self, event: AstrMessageEvent):
+        """刷新缓存的STT/LLM提供商，在框架中切换或重载提供商后使用"""
+        try:
+            self._llm_provider = None
+            self._llm_provider_name = None
+            self.stt_service.invalidate_provider_cache()
+            logger.info("已清除缓存的STT/LLM提供商")
+            yield event.plain_result("✅ 已刷新STT/LLM提供商，下一条语音将使用最新配置")
+            
+        except Exception as e:
+            logger.error("刷新提供商失败: %s", e)
+            yield event.plain_result(f"刷新失败: {str(e)}")
+    
     async def terminate(self):
         """插件卸载时的清理工作 - 重构版本"""
         try:
+            # 通知后台清理任务退出，并等待其处理完剩余文件
+            if self._cleanup_task and not self._cleanup_task.done():
+                self._cleanup_queue.put_nowait(None)
+                try:
+                    await asyncio.wait_for(self._cleanup_task, timeout=10)
+                except asyncio.TimeoutError:
+                    self._cleanup_task.cancel()
             await self._cleanup_resources()
+            await self.voice_processing_service.close()
+            await self.stt_service.close()
+            await self.stt_cache_service.close()
             logger.info("重构版语音转文字插件已卸载")
         except Exception as e:
-            logger.error(f"插件卸载清理失败: {e}")
+            logger.error("插件卸载清理失败: %s", e)
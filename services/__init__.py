@@ -6,11 +6,13 @@
 from .voice_processing_service import VoiceProcessingService
 from .permission_service import PermissionService
 from .stt_service import STTService
+from .stt_cache_service import STTCacheService
 
 __all__ = [
     'VoiceProcessingService',
     'PermissionService', 
-    'STTService'
+    'STTService',
+    'STTCacheService'
 ]
 
 # 版本信息
@@ -1,8 +1,8 @@
 """
 权限检查服务 - 统一处理群聊权限逻辑
 """
-from calendar import c
-from typing import Dict, List
+import logging
+from typing import Dict, List, Tuple
 from astrbot.api import logger
 from astrbot.api.event import AstrMessageEvent
 from astrbot.core.platform.message_type import MessageType
@@ -11,6 +11,12 @@ from ..config import PluginConfig
 from ..exceptions import PermissionError
 from ..utils.decorators import cache_result
 
+
+def _to_group_set(group_ids) -> frozenset:
+    """将配置中的群号列表转为字符串集合，配置里填写数字群号时也能与事件中的群ID匹配"""
+    return frozenset(str(group_id) for group_id in group_ids or ())
+
+
 class PermissionService:
     """权限检查服务 - 专门处理群聊权限验证"""
     
@@ -27,64 +33,92 @@ class PermissionService:
         group_settings = self.config.get("Group_Chat_Settings", {})
         self.enable_group_voice_recognition = group_settings.get("Enable_Group_Voice_Recognition", True)
         self.enable_group_voice_reply = group_settings.get("Enable_Group_Voice_Reply", True) # 修改默认值为True
-        self.group_recognition_whitelist = set(group_settings.get("Group_Recognition_Whitelist", []))
-        self.group_reply_whitelist = set(group_settings.get("Group_Reply_Whitelist", []))
-        self.group_recognition_blacklist = set(group_settings.get("Group_Recognition_Blacklist", []))
-        self.group_reply_blacklist = set(group_settings.get("Group_Reply_Blacklist", []))
+        self.group_recognition_whitelist = _to_group_set(group_settings.get("Group_Recognition_Whitelist", []))
+        self.group_reply_whitelist = _to_group_set(group_settings.get("Group_Reply_Whitelist", []))
+        self.group_recognition_blacklist = _to_group_set(group_settings.get("Group_Recognition_Blacklist", []))
+        self.group_reply_blacklist = _to_group_set(group_settings.get("Group_Reply_Blacklist", []))
+        
+        self._rebuild_permission_table()
         
-        logger.info(f"权限检查服务初始化完成，Group_Chat_Permission: {self.group_reply_whitelist}") # 添加日志输出
+        logger.info("权限检查服务初始化完成，Group_Chat_Permission: %s", self.group_reply_whitelist) # 添加日志输出
     
-    async def can_process_voice(self, event: AstrMessageEvent) -> bool:
-        """检查是否可以处理语音消息"""
+    def check_permissions(self, event: AstrMessageEvent) -> Tuple[bool, bool]:
+        """
+        同时检查语音识别和智能回复权限，消息类型和群ID只获取一次
+        
+        权限判定只涉及查表，没有I/O，因此为同步方法
+        
+        Returns:
+            tuple: (是否可以处理语音, 是否可以生成回复)
+        """
         try:
             message_type = event.get_message_type()
             
-            # 私聊消息总是允许处理
-            if message_type == MessageType.FRIEND_MESSAGE:
-                logger.debug("私聊消息，允许语音识别")
-                return True
+            # 私聊消息总是允许处理和回复
+            if message_type is MessageType.FRIEND_MESSAGE:
+                return True, True
             
-            # 群聊消息需要检查权限
-            if message_type == MessageType.GROUP_MESSAGE:
+            # 群聊消息需要检查权限，识别未通过时无需再检查回复
+            if message_type is MessageType.GROUP_MESSAGE:
                 group_id = event.get_group_id()
-                return await self._check_group_permission(group_id, "recognition")
+                if not self._check_group_permission(group_id, "recognition"):
+                    return False, False
+                return True, self._check_group_permission(group_id, "reply")
             
             # 其他消息类型不处理
-            logger.debug(f"未知消息类型，不处理: {message_type}")
-            return False
+            logger.debug("未知消息类型，不处理: %s", message_type)
+            return False, False
             
         except Exception as e:
-            logger.error(f"权限检查失败: {e}")
-            return False
+            logger.error("权限检查失败: %s", e)
+            return False, False
     
-    async def can_generate_reply(self, event: AstrMessageEvent) -> bool:
-        """检查是否可以生成智能回复"""
-        try:
-            message_type = event.get_message_type()
-            
-            # 私聊消息总是允许回复
-            if message_type == MessageType.FRIEND_MESSAGE:
-                logger.debug("私聊消息，允许智能回复")
-                return True
-            
-            # 群聊消息需要检查回复权限
-            if message_type == MessageType.GROUP_MESSAGE:
-                group_id = event.get_group_id()
-                can_reply = await self._check_group_permission(group_id, "reply")
-                return can_reply
-            
-            # 其他消息类型不回复
-            logger.debug(f"未知消息类型，不生成回复: {message_type}")
-            return False
-            
-        except Exception as e:
-            logger.error(f"回复权限检查失败: {e}")
-            return False
-            
-    @cache_result(ttl_seconds=60)  # 缓存1分钟
-    async def _check_group_permission(self, group_id: str, action: str) -> bool:
+    def can_process_voice(self, event: AstrMessageEvent) -> bool:
+        """检查是否可以处理语音消息，规则见 check_permissions"""
+        return self.check_permissions(event)[0]
+    
+    def can_generate_reply(self, event: AstrMessageEvent) -> bool:
+        """检查是否可以生成智能回复，规则见 check_permissions（群聊中识别未通过时也不回复）"""
+        return self.check_permissions(event)[1]
+    
+    def _rebuild_permission_table(self):
         """
-        检查群聊权限 - 优化版本
+        根据当前配置预先计算权限决策表，并刷新静态状态信息
+        
+        _perm_table: 操作类型 -> {群ID: 是否允许}，只包含黑白名单中的群
+        _default_perm: 操作类型 -> 不在任何名单中的群是否允许
+        """
+        self._perm_table = {}
+        self._default_perm = {}
+        for action, enabled, blacklist, whitelist in (
+            ("recognition", self.enable_group_voice_recognition,
+             self.group_recognition_blacklist, self.group_recognition_whitelist),
+            ("reply", self.enable_group_voice_reply,
+             self.group_reply_blacklist, self.group_reply_whitelist),
+        ):
+            table = {}
+            if enabled:
+                table.update(dict.fromkeys(whitelist, True))
+                # 同时在黑白名单中的群以黑名单为准
+                table.update(dict.fromkeys(blacklist, False))
+            self._perm_table[action] = table
+            # 功能启用且未设置白名单时，名单外的群默认允许
+            self._default_perm[action] = bool(enabled and not whitelist)
+        # 名单仅在配置变更时改变，名单大小等静态状态随决策表一并预先计算
+        self._base_status = {
+            'group_voice_recognition_enabled': self.enable_group_voice_recognition,
+            'group_voice_reply_enabled': self.enable_group_voice_reply,
+            'recognition_whitelist_count': len(self.group_recognition_whitelist),
+            'reply_whitelist_count': len(self.group_reply_whitelist),
+            'recognition_blacklist_count': len(self.group_recognition_blacklist),
+            'reply_blacklist_count': len(self.group_reply_blacklist)
+        }
+    
+    def _check_group_permission(self, group_id: str, action: str) -> bool:
+        """
+        检查群聊权限 - 查询预先计算的决策表，名单更新时重建
+        
+        规则: 功能启用，且不在黑名单中；白名单不为空时必须在白名单中
         
         Args:
             group_id: 群聊ID
@@ -93,71 +127,34 @@ class PermissionService:
         Returns:
             bool: 是否允许操作
         """
-        if not group_id:
-            logger.debug("群聊ID为空，拒绝处理")
-            return False
-        
-        # 根据操作类型获取配置
-        if action == "recognition":
-            enabled = self.enable_group_voice_recognition
-            blacklist = self.group_recognition_blacklist
-            whitelist = self.group_recognition_whitelist
-        elif action == "reply":
-            enabled = self.enable_group_voice_reply
-            blacklist = self.group_reply_blacklist
-            whitelist = self.group_reply_whitelist
-        else:
-            logger.warning(f"未知的操作类型: {action}")
+        table = self._perm_table.get(action)
+        if table is None:
+            logger.warning("未知的操作类型: %s", action)
             return False
         
-        # 权限检查逻辑
-        if not enabled:
-            logger.debug(f"群聊ID: {group_id} - 语音{action}功能已禁用")
-            return False
+        allowed = bool(group_id) and table.get(group_id, self._default_perm[action])
         
-        # 黑名单检查（优先级最高）
-        if group_id in blacklist:
-            logger.debug(f"群聊ID: {group_id} - 在{action}黑名单中")
-            return False
-
-        # 白名单检查
-        if whitelist: # 如果白名单不为空，则只允许白名单中的群聊
-            if group_id not in whitelist:
-                logger.info(f"群聊ID: {group_id} - 不在{action}白名单中")
-                return False
-            else:
-                logger.info(f"群聊ID: {group_id} - 在{action}白名单中")
-                logger.debug(f"群聊ID: {group_id} - 语音{action}权限检查通过")
-                return True
-        else: # 如果白名单为空，则对所有群聊生效（在黑名单中除外）
-            logger.info(f"群聊ID: {group_id} - {action}白名单为空，对所有群聊生效")
-            logger.debug(f"群聊ID: {group_id} - 语音{action}权限检查通过")
-            return True
-        return False
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("群聊ID: %s - 语音%s权限检查%s", group_id, action, "通过" if allowed else "未通过")
+        return allowed
     
+    @cache_result(ttl_seconds=5)  # 状态查询幂等，短时间内复用结果
     async def get_permission_status(self, group_id: str = None) -> Dict:
         """获取权限状态信息"""
-        status = {
-            'group_voice_recognition_enabled': self.enable_group_voice_recognition,
-            'group_voice_reply_enabled': self.enable_group_voice_reply,
-            'recognition_whitelist_count': len(self.group_recognition_whitelist),
-            'reply_whitelist_count': len(self.group_reply_whitelist),
-            'recognition_blacklist_count': len(self.group_recognition_blacklist),
-            'reply_blacklist_count': len(self.group_reply_blacklist)
-        }
+        status = dict(self._base_status)
         
         # 如果提供了群ID，返回该群的权限状态
         if group_id:
             status.update({
                 'current_group_id': group_id,
-                'can_recognize': await self._check_group_permission(group_id, "recognition"),
-                'can_reply': await self._check_group_permission(group_id, "reply")
+                'can_recognize': self._check_group_permission(group_id, "recognition"),
+                'can_reply': self._check_group_permission(group_id, "reply")
             })
         
         return status
     
     def update_group_permission(self, group_id: str, action: str, permission_type: str, allowed: bool):
-        """动态更新群聊权限"""
+        """动态更新群聊权限 - 名单为不可变集合，更新时整体替换"""
         try:
             if action == "recognition":
                 blacklist = self.group_recognition_blacklist
@@ -168,23 +165,33 @@ class PermissionService:
             else:
                 raise ValueError(f"未知操作类型: {action}")
             
+            group = frozenset((str(group_id),))
+            
             if permission_type == "blacklist":
                 if allowed:
-                    blacklist.discard(group_id)  # 从黑名单移除
+                    blacklist = blacklist - group  # 从黑名单移除
                 else:
-                    blacklist.add(group_id)  # 添加到黑名单
-                    whitelist.discard(group_id)  # 从白名单移除（如果存在）
+                    blacklist = blacklist | group  # 添加到黑名单
+                    whitelist = whitelist - group  # 从白名单移除（如果存在）
             elif permission_type == "whitelist":
                 if allowed:
-                    whitelist.add(group_id)  # 添加到白名单
-                    blacklist.discard(group_id)  # 从黑名单移除（如果存在）
+                    whitelist = whitelist | group  # 添加到白名单
+                    blacklist = blacklist - group  # 从黑名单移除（如果存在）
                 else:
-                    whitelist.discard(group_id)  # 从白名单移除
+                    whitelist = whitelist - group  # 从白名单移除
             else:
                 raise ValueError(f"未知权限类型: {permission_type}")
             
-            logger.info(f"更新群聊权限成功: {group_id} - {action} - {permission_type} - {allowed}")
+            if action == "recognition":
+                self.group_recognition_blacklist = blacklist
+                self.group_recognition_whitelist = whitelist
+            else:
+                self.group_reply_blacklist = blacklist
+                self.group_reply_whitelist = whitelist
+            self._rebuild_permission_table()
+            
+            logger.info("更新群聊权限成功: %s - %s - %s - %s", group_id, action, permission_type, allowed)
             
         except Exception as e:
-            logger.error(f"更新群聊权限失败: {e}")
+            logger.error("更新群聊权限失败: %s", e)
             raise PermissionError(f"权限更新失败: {str(e)}")
@@ -0,0 +1,207 @@
+"""
+STT缓存服务 - 按识别引擎和音频内容哈希缓存语音识别结果
+"""
+import os
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+from astrbot.api import logger
+from astrbot.core.utils.astrbot_path import get_astrbot_data_path
+
+# 计算音频哈希时每次读取的块大小
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class STTCacheService:
+    """STT结果缓存服务 - 相同音频内容直接复用识别结果，跳过STT调用
+
+    内存LRU作为一级缓存；配置了持久化条目数时以SQLite作为二级缓存，使识别结果在插件重载/重启后仍可复用
+    """
+
+    def __init__(self, config: dict, db_path: str = None):
+        """
+        初始化STT缓存服务
+
+        Args:
+            config: 原始配置字典
+            db_path: 持久化数据库路径，默认位于插件数据目录
+        """
+        processing_config = config.get("Processing_Config", {})
+        self.max_entries = max(0, int(processing_config.get("STT_Cache_Size", 256)))
+        self.max_db_entries = max(0, int(processing_config.get("STT_Cache_DB_Size", 0)))
+
+        # LRU缓存: 引擎与音频哈希 -> 识别文本
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        # SQLite持久化，连接延迟到首次使用时创建
+        self._db_path = db_path or os.path.join(
+            get_astrbot_data_path(), "plugin_data", "astrbot_plugin_voice_to_text", "cache.db"
+        )
+        self._db_conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+        logger.info("STT缓存服务初始化完成，最大条目数: %s，持久化条目数: %s", self.max_entries, self.max_db_entries)
+
+    @property
+    def enabled(self) -> bool:
+        """缓存是否启用"""
+        return self.max_entries > 0
+
+    @property
+    def persistent(self) -> bool:
+        """是否启用持久化缓存"""
+        return self.enabled and self.max_db_entries > 0
+
+    async def compute_key(self, audio_file_path: str, engine: str = "") -> Optional[str]:
+        """
+        计算识别引擎标识与音频文件内容的哈希，作为缓存键
+
+        Args:
+            audio_file_path: 音频文件路径
+            engine: 识别引擎标识（来源、提供商、模型），切换引擎后不会命中旧引擎的结果
+
+        Returns:
+            str: 内容哈希，缓存禁用或读取失败时返回None
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            return await asyncio.to_thread(self._hash_file, audio_file_path, engine)
+        except Exception as e:
+            logger.debug("计算音频哈希失败: %s", e)
+            return None
+
+    @staticmethod
+    def _hash_file(file_path: str, engine: str = "") -> str:
+        """同步计算引擎标识与文件内容的blake2b哈希，按块读取避免大文件一次性载入内存"""
+        hasher = hashlib.blake2b(engine.encode('utf-8'), digest_size=16)
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """查询缓存，先查内存再查SQLite，命中时刷新LRU顺序"""
+        text = self._cache.get(key)
+        if text is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return text
+
+        if self.persistent:
+            try:
+                text = await asyncio.to_thread(self._db_get, key)
+            except Exception as e:
+                logger.warning("读取STT持久化缓存失败: %s", e)
+                text = None
+
+            if text is not None:
+                self._memory_put(key, text)
+                self.hits += 1
+                return text
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, text: str):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        if not self.enabled or not text:
+            return
+
+        self._memory_put(key, text)
+
+        if self.persistent:
+            try:
+                await asyncio.to_thread(self._db_put, key, text)
+            except Exception as e:
+                logger.warning("写入STT持久化缓存失败: %s", e)
+
+    def _memory_put(self, key: str, text: str):
+        """写入内存LRU"""
+        self._cache[key] = text
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def _get_db(self) -> sqlite3.Connection:
+        """获取数据库连接，首次调用时建表（需持有 _db_lock）"""
+        if self._db_conn is None:
+            os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
+            conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS stt("
+                "hash TEXT PRIMARY KEY, text TEXT NOT NULL, "
+                "last_used INTEGER NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_stt_last_used ON stt(last_used)")
+            conn.commit()
+            self._db_conn = conn
+        return self._db_conn
+
+    def _db_get(self, key: str) -> Optional[str]:
+        """同步查询SQLite缓存"""
+        with self._db_lock:
+            conn = self._get_db()
+            row = conn.execute("SELECT text FROM stt WHERE hash = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE stt SET last_used = ?, hits = hits + 1 WHERE hash = ?",
+                (int(time.time()), key)
+            )
+            conn.commit()
+            return row[0]
+
+    def _db_put(self, key: str, text: str):
+        """同步写入SQLite缓存"""
+        with self._db_lock:
+            conn = self._get_db()
+            conn.execute(
+                "INSERT INTO stt(hash, text, last_used, hits) VALUES (?, ?, ?, 0) "
+                "ON CONFLICT(hash) DO UPDATE SET text = excluded.text, last_used = excluded.last_used",
+                (key, text, int(time.time()))
+            )
+            conn.commit()
+
+    def _db_trim_and_close(self):
+        """同步裁剪SQLite缓存到容量上限并关闭连接"""
+        with self._db_lock:
+            if self._db_conn is None:
+                return
+            try:
+                self._db_conn.execute(
+                    "DELETE FROM stt WHERE rowid IN "
+                    "(SELECT rowid FROM stt ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_db_entries,)
+                )
+                self._db_conn.commit()
+            finally:
+                self._db_conn.close()
+                self._db_conn = None
+
+    async def close(self):
+        """裁剪并关闭持久化缓存"""
+        try:
+            await asyncio.to_thread(self._db_trim_and_close)
+        except Exception as e:
+            logger.warning("关闭STT持久化缓存失败: %s", e)
+
+    def get_cache_status(self) -> dict:
+        """获取缓存状态"""
+        total = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'persistent': self.persistent,
+            'size': len(self._cache),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / total * 100) if total else 0.0
+        }
@@ -1,6 +1,8 @@
 """
 STT服务层 - 统一处理语音转文字的业务逻辑
 """
+import asyncio
+import time
 from typing import Optional
 from astrbot.api import logger
 from astrbot.api.event import AstrMessageEvent
@@ -10,6 +12,9 @@ from ..exceptions import STTProviderError
 from ..utils.decorators import async_operation_handler, retry_on_failure
 from ..stt_providers import STTProviderManager, get_provider_default_config
 
+# 缓存的框架提供商句柄有效期，过期后重新解析，使框架中切换的提供商无需 /voice_reload 也能生效
+_PROVIDER_CACHE_TTL_SECONDS = 30
+
 class STTService:
     """STT服务 - 专门处理语音转文字调用"""
     
@@ -30,15 +35,29 @@ class STTService:
         self.framework_stt_provider_name = voice_recognition.get("Framework_STT_Provider_Name", "")
         self.enable_voice_processing = voice_recognition.get("Enable_Voice_Processing", True)
         
-        # 初始化插件STT管理器（如果使用plugin模式）
+        # STT并发上限，避免语音刷屏时压垮STT后端，超出的请求排队等待
+        processing_config = self.config.get("Processing_Config", {})
+        max_concurrency = processing_config.get("STT_Max_Concurrency", 4)
+        self._stt_semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+        
+        # 缓存的框架STT提供商句柄
+        self._framework_provider = None
+        self._framework_provider_specified = False
+        self._framework_provider_name = None
+        self._framework_provider_resolved_at = 0.0
+        # 框架STT提供商ID索引: 提供商ID -> 提供商对象
+        self._framework_providers_by_id: Optional[dict] = None
+        
+        # 插件STT管理器延迟到首次转录时创建，这里只解析配置
         self.stt_manager = None
+        self._stt_manager_kwargs: Optional[dict] = None
         if self.stt_source == "plugin":
             self._initialize_plugin_stt()
         
-        logger.info(f"STT服务初始化完成，使用来源: {self.stt_source}")
+        logger.info("STT服务初始化完成，使用来源: %s", self.stt_source)
     
     def _initialize_plugin_stt(self):
-        """初始化插件STT管理器"""
+        """解析插件STT配置，管理器本身在首次使用时由 _get_stt_manager 创建"""
         try:
             stt_api_config = self.config.get("STT_API_Config", {})
             api_key = stt_api_config.get("API_Key", "")
@@ -67,8 +86,7 @@ class STTService:
             if not model:
                 model = default_config["default_model"]
             
-            # 初始化STT提供商管理器
-            self.stt_manager = STTProviderManager(
+            self._stt_manager_kwargs = dict(
                 provider_type=provider_type,
                 api_key=api_key,
                 api_base_url=api_base_url,
@@ -77,11 +95,26 @@ class STTService:
                 **custom_kwargs
             )
             
-            logger.info(f"插件STT提供商管理器初始化成功: {provider_type}")
-            
         except Exception as e:
-            logger.error(f"插件STT提供商管理器初始化失败: {e}")
-            self.stt_manager = None
+            logger.error("插件STT配置解析失败: %s", e)
+            self._stt_manager_kwargs = None
+    
+    def _get_stt_manager(self) -> Optional[STTProviderManager]:
+        """获取插件STT提供商管理器，首次调用时创建"""
+        if self.stt_manager is None and self._stt_manager_kwargs is not None:
+            try:
+                self.stt_manager = STTProviderManager(**self._stt_manager_kwargs)
+                logger.info("插件STT提供商管理器初始化成功: %s", self._stt_manager_kwargs["provider_type"])
+            except Exception as e:
+                logger.error("插件STT提供商管理器初始化失败: %s", e)
+                # 配置无效，后续不再重复尝试
+                self._stt_manager_kwargs = None
+        return self.stt_manager
+    
+    @property
+    def _plugin_stt_configured(self) -> bool:
+        """插件STT是否已配置（管理器已创建或可在首次使用时创建）"""
+        return self.stt_manager is not None or self._stt_manager_kwargs is not None
     
     @async_operation_handler("语音转文字")
     @retry_on_failure(max_retries=2)
@@ -106,6 +139,118 @@ class STTService:
         else:
             raise STTProviderError(f"未知的STT服务来源: {self.stt_source}")
     
+    @property
+    def accepts_audio_bytes(self) -> bool:
+        """是否可以直接转录内存中的音频数据（仅插件STT支持，框架STT只接受文件路径）"""
+        return self.enable_voice_processing and self.stt_source == "plugin" and self._plugin_stt_configured
+    
+    @async_operation_handler("语音转文字(内存数据)")
+    @retry_on_failure(max_retries=2)
+    async def transcribe_audio_bytes(self, audio_data: bytes) -> Optional[str]:
+        """
+        转录内存中的MP3音频数据，省去临时文件的写入和读取
+        
+        Args:
+            audio_data: MP3格式的音频数据
+            
+        Returns:
+            str: 转录的文本，如果失败返回None
+        """
+        if not self.accepts_audio_bytes:
+            raise STTProviderError("当前STT服务来源不支持直接转录音频数据")
+        
+        stt_manager = self._get_stt_manager()
+        if not stt_manager:
+            raise STTProviderError("插件STT提供商管理器未初始化")
+        
+        try:
+            result = await stt_manager.transcribe_audio_bytes(audio_data)
+        except Exception as e:
+            logger.error("STT提供商管理器转录失败: %s", e)
+            raise STTProviderError(f"插件STT调用失败: {str(e)}") from e
+        
+        if not result:
+            logger.warning("STT提供商管理器返回空结果")
+            return None
+        return result
+    
+    async def submit_transcription(self, audio_file_path: str) -> Optional[str]:
+        """
+        提交转录请求，受STT并发上限约束
+        
+        Args:
+            audio_file_path: 音频文件路径
+            
+        Returns:
+            str: 转录的文本，如果失败返回None
+        """
+        async with self._stt_semaphore:
+            return await self.transcribe_audio(audio_file_path)
+    
+    async def submit_audio_bytes(self, audio_data: bytes) -> Optional[str]:
+        """
+        提交内存音频数据的转录请求，受STT并发上限约束
+        
+        Args:
+            audio_data: MP3格式的音频数据
+            
+        Returns:
+            str: 转录的文本，如果失败返回None
+        """
+        async with self._stt_semaphore:
+            return await self.transcribe_audio_bytes(audio_data)
+    
+    async def close(self):
+        """释放插件STT的HTTP连接"""
+        if self.stt_manager:
+            await self.stt_manager.close()
+    
+    def _resolve_framework_provider(self) -> tuple:
+        """
+        解析框架STT提供商，结果在有效期内缓存在实例上，避免每条语音重复查找
+        
+        Returns:
+            tuple: (提供商对象, 是否为指定的提供商)
+        """
+        if self._framework_provider is not None:
+            if time.monotonic() - self._framework_provider_resolved_at < _PROVIDER_CACHE_TTL_SECONDS:
+                return self._framework_provider, self._framework_provider_specified
+            self.invalidate_provider_cache()
+        
+        provider = None
+        specified = False
+        
+        # 如果指定了特定的框架STT提供商名字，尝试查找并使用
+        if self.framework_stt_provider_name:
+            if self._framework_providers_by_id is None:
+                self._framework_providers_by_id = {
+                    candidate.meta().id: candidate for candidate in self.context.get_all_stt_providers()
+                }
+            provider = self._framework_providers_by_id.get(self.framework_stt_provider_name)
+            if provider is not None:
+                specified = True
+            else:
+                logger.warning("未找到指定的框架STT提供商: %s，使用默认提供商", self.framework_stt_provider_name)
+        
+        # 使用默认的框架STT提供商
+        if provider is None:
+            provider = self.context.get_using_stt_provider()
+        
+        if provider is not None:
+            self._framework_provider = provider
+            self._framework_provider_specified = specified
+            self._framework_provider_resolved_at = time.monotonic()
+            # 展示名随句柄一并缓存，避免每条消息重复计算
+            self._framework_provider_name = type(provider).__name__
+        return provider, specified
+    
+    def invalidate_provider_cache(self):
+        """清除缓存的提供商句柄，下次调用时重新解析"""
+        self._framework_provider = None
+        self._framework_provider_specified = False
+        self._framework_provider_name = None
+        self._framework_providers_by_id = None
+    
     @async_operation_handler("框架STT调用")
     async def _call_framework_stt(self, audio_file_path: str) -> Optional[str]:
         """调用AstrBot框架STT接口"""
@@ -113,38 +258,16 @@ class STTService:
             raise STTProviderError("缺少AstrBot上下文对象")
         
         try:
-            # 如果指定了特定的框架STT提供商名字，尝试查找并使用
-            if self.framework_stt_provider_name:
-                all_stt_providers = self.context.get_all_stt_providers()
-                
-                # 查找指定名字的提供商
-                target_provider = None
-                for provider in all_stt_providers:
-                    provider_meta = provider.meta()
-                    if provider_meta.id == self.framework_stt_provider_name:
-                        target_provider = provider
-                        break
-                
-                if target_provider:
-                    logger.info(f"使用指定的框架STT提供商: {self.framework_stt_provider_name}")
-                    result = await target_provider.get_text(audio_file_path)
-                    
-                    if result:
-                        logger.info("指定框架STT提供商识别成功")
-                        return result
-                    else:
-                        logger.warning("指定框架STT提供商返回空结果")
-                        return None
-                else:
-                    logger.warning(f"未找到指定的框架STT提供商: {self.framework_stt_provider_name}，使用默认提供商")
-            
-            # 使用默认的框架STT提供商
-            stt_provider = self.context.get_using_stt_provider()
+            stt_provider, specified = self._resolve_framework_provider()
             
             if not stt_provider:
                 raise STTProviderError("未配置AstrBot框架STT提供商")
             
-            logger.info(f"使用AstrBot框架默认STT提供商: {type(stt_provider).__name__}")
+            # 使用哪个提供商属于静态信息，不在每条消息上输出INFO日志
+            if specified:
+                logger.debug("使用指定的框架STT提供商: %s", self.framework_stt_provider_name)
+            else:
+                logger.debug("使用AstrBot框架默认STT提供商: %s", self._framework_provider_name)
             result = await stt_provider.get_text(audio_file_path)
             
             if result:
@@ -155,18 +278,21 @@ class STTService:
                 return None
                 
         except Exception as e:
-            logger.error(f"调用AstrBot框架STT接口失败: {e}")
+            # 提供商可能已被重载或移除，下次重新解析
+            self.invalidate_provider_cache()
+            logger.error("调用AstrBot框架STT接口失败: %s", e)
             raise STTProviderError(f"框架STT调用失败: {str(e)}") from e
     
     @async_operation_handler("插件STT调用")
     async def _call_plugin_stt(self, audio_file_path: str) -> Optional[str]:
         """调用插件独立STT API"""
-        if not self.stt_manager:
+        stt_manager = self._get_stt_manager()
+        if not stt_manager:
             raise STTProviderError("插件STT提供商管理器未初始化")
         
         try:
-            logger.info(f"使用STT提供商管理器进行语音转录")
-            result = await self.stt_manager.transcribe_audio(audio_file_path)
+            logger.info("使用STT提供商管理器进行语音转录")
+            result = await stt_manager.transcribe_audio(audio_file_path)
             
             if result:
                 logger.info("STT提供商管理器转录成功")
@@ -176,9 +302,49 @@ class STTService:
                 return None
                 
         except Exception as e:
-            logger.error(f"STT提供商管理器转录失败: {e}")
+            logger.error("STT提供商管理器转录失败: %s", e)
             raise STTProviderError(f"插件STT调用失败: {str(e)}") from e
     
+    async def ensure_connected(self):
+        """插件STT模式下预先建立HTTP连接，可与格式转换并行执行，失败不影响后续调用"""
+        stt_manager = self._get_stt_manager()
+        if stt_manager:
+            await stt_manager.ensure_connected()
+    
+    async def warm_up(self):
+        """预热STT服务 - 提前解析提供商，失败不影响后续正常调用"""
+        try:
+            if not self.enable_voice_processing:
+                return
+            
+            if self.stt_source == "framework" and self.context:
+                self._resolve_framework_provider()
+                logger.debug("STT服务预热完成，框架提供商: %s", self._framework_provider_name or '未配置')
+            elif self.stt_source == "plugin":
+                logger.debug("STT服务预热完成，插件提供商管理器: %s", '可用' if self._plugin_stt_configured else '不可用')
+        except Exception as e:
+            logger.debug("STT服务预热失败: %s", e)
+    
+    def get_engine_signature(self) -> str:
+        """
+        获取当前识别引擎的标识（来源、提供商、模型），用于区分不同引擎产生的识别结果
+        
+        Returns:
+            str: 引擎标识，框架提供商未配置时提供商和模型部分为空
+        """
+        if self.stt_source == "plugin":
+            kwargs = self._stt_manager_kwargs or {}
+            return f"plugin|{kwargs.get('provider_type', '')}|{kwargs.get('model', '')}"
+        
+        provider_id = model = ""
+        if self.stt_source == "framework" and self.context:
+            stt_provider, _ = self._resolve_framework_provider()
+            if stt_provider is not None:
+                meta = stt_provider.meta()
+                provider_id = getattr(meta, "id", "") or ""
+                model = getattr(meta, "model", "") or ""
+        return f"{self.stt_source}|{provider_id}|{model}"
+    
     def get_stt_status(self) -> dict:
         """获取STT服务状态"""
         status = {
@@ -188,10 +354,10 @@ class STTService:
         
         if self.stt_source == "framework":
             if self.context:
-                stt_provider = self.context.get_using_stt_provider()
+                stt_provider, _ = self._resolve_framework_provider()
                 status.update({
                     'framework_provider_available': stt_provider is not None,
-                    'framework_provider_name': type(stt_provider).__name__ if stt_provider else None,
+                    'framework_provider_name': self._framework_provider_name if stt_provider else None,
                     'specified_provider_name': self.framework_stt_provider_name or "默认"
                 })
             else:
@@ -202,7 +368,7 @@ class STTService:
         
         elif self.stt_source == "plugin":
             status.update({
-                'plugin_manager_available': self.stt_manager is not None,
+                'plugin_manager_available': self._plugin_stt_configured,
                 'plugin_provider_info': self.stt_manager.get_provider_info() if self.stt_manager else None
             })
         
@@ -214,8 +380,8 @@ class STTService:
             return False
         
         if self.stt_source == "framework":
-            return self.context and self.context.get_using_stt_provider() is not None
+            return bool(self.context) and self._resolve_framework_provider()[0] is not None
         elif self.stt_source == "plugin":
-            return self.stt_manager is not None
+            return self._plugin_stt_configured
         
         return False
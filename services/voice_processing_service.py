@@ -2,7 +2,7 @@
 语音处理服务 - 统一处理语音消息的业务逻辑
 """
 import os
-from typing import Optional, AsyncGenerator
+from typing import Optional, AsyncGenerator, List, Tuple
 from astrbot.api import logger
 from astrbot.api.message_components import Record
 from astrbot.api.event import AstrMessageEvent
@@ -11,13 +11,18 @@ from ..config import PluginConfig
 from ..exceptions import VoiceToTextError, FileNotFoundError
 from ..utils.decorators import async_operation_handler
 from ..core.factory import ComponentFactory
+from ..core.conversion_strategies import shutdown_conversion_executor
 from ..voice_file_resolver import VoiceFileResolver
 
+# FFmpeg管道转换无法处理的格式：SILK需要专用解码器，未知格式依赖多策略回退
+_PIPE_UNSUPPORTED_FORMATS = frozenset(('silk', 'invalid', 'unknown'))
+
 class VoiceProcessingService:
     """语音处理服务 - 专注于语音消息处理流程"""
     
     def __init__(self, config: PluginConfig = None):
         self.config = config or PluginConfig.create_default()
+        self._max_file_size_bytes = self.config.audio.MAX_FILE_SIZE_MB * 1024 * 1024
         # 使用工厂模式创建音频处理组件，避免循环导入
         self.audio_converter = ComponentFactory.create_audio_converter(self.config)
         self.file_resolver = VoiceFileResolver()
@@ -27,59 +32,108 @@ class VoiceProcessingService:
         
         logger.info("语音处理服务初始化完成")
     
-    @async_operation_handler("语音文件处理")
-    async def process_voice_file(self, voice: Record) -> Optional[str]:
+    @async_operation_handler("语音文件获取")
+    async def resolve_voice_file(self, voice: Record) -> Tuple[str, str]:
         """
-        处理语音文件，返回可用于STT的文件路径
+        获取并校验原始语音文件，不做格式转换
         
         Args:
             voice: 语音消息对象
             
         Returns:
-            str: 处理后的音频文件路径，如果失败返回None
+            tuple: (原始语音文件路径, 检测到的音频格式)
         """
-        try:
-            # 1. 获取语音文件路径
-            original_path = await self._get_voice_file_path(voice)
-            if not original_path:
-                raise FileNotFoundError("无法获取语音文件路径")
-            
-            # 2. 验证文件
-            if not await self.audio_converter.validate_audio_file(original_path):
-                raise VoiceToTextError("语音文件验证失败")
+        # 失败日志由装饰器和调用方统一输出，这里不再重复记录
+        # 1. 获取语音文件路径
+        original_path, from_framework = await self._get_voice_file_path(voice)
+        if not original_path:
+            raise FileNotFoundError("无法获取语音文件路径")
+        
+        # 2. 一次打开文件完成大小检查、校验和格式检测，只有框架生成的文件才信任扩展名
+        file_size, input_format = await self.audio_converter.inspect_audio_file(
+            original_path, trust_extension=from_framework
+        )
+        if file_size < 0:
+            raise FileNotFoundError("语音文件不可访问")
+        if file_size > self._max_file_size_bytes:
+            raise VoiceToTextError(f"文件过大，超过{self.config.audio.MAX_FILE_SIZE_MB}MB限制")
+        
+        # 3. 验证文件
+        if input_format == 'invalid':
+            raise VoiceToTextError("语音文件验证失败")
+        
+        return original_path, input_format
+    
+    @async_operation_handler("语音格式转换")
+    async def prepare_for_stt(self, original_path: str, input_format: str = None) -> str:
+        """
+        将原始语音文件转换为STT支持的格式
+        
+        Args:
+            original_path: 原始语音文件路径
+            input_format: 已检测出的音频格式，为None时重新检测
             
-            # 3. 检查文件大小
-            file_size = os.path.getsize(original_path)
-            if file_size > self.config.audio.MAX_FILE_SIZE_MB * 1024 * 1024:
-                raise VoiceToTextError(f"文件过大，超过{self.config.audio.MAX_FILE_SIZE_MB}MB限制")
+        Returns:
+            str: 处理后的音频文件路径，已是支持格式时返回原路径
+        """
+        processed_path = await self.audio_converter.convert_to_supported_format(
+            original_path, input_format=input_format
+        )
+        
+        logger.debug("语音文件处理成功: %s", processed_path)
+        return processed_path
+    
+    async def prepare_bytes_for_stt(self, original_path: str, input_format: str = None) -> Optional[bytes]:
+        """
+        通过FFmpeg管道将语音转换为MP3数据，不产生临时文件
+        
+        Args:
+            original_path: 原始语音文件路径
+            input_format: 已检测出的音频格式，为None时重新检测
             
-            # 4. 转换为支持的格式
-            processed_path = await self.audio_converter.convert_to_supported_format(original_path)
+        Returns:
+            bytes: MP3音频数据；无需转换、FFmpeg无法处理或转换失败时返回None，由调用方走文件转换流程
+        """
+        try:
+            if input_format is None:
+                input_format = await self.audio_converter.detect_format(original_path)
+            if (input_format in _PIPE_UNSUPPORTED_FORMATS
+                    or self.audio_converter.format_detector.is_supported_format(input_format)
+                    or not self.ffmpeg_manager.is_available()):
+                return None
             
-            logger.info(f"语音文件处理成功: {processed_path}")
-            return processed_path
+            return await self.ffmpeg_manager.convert_audio_to_bytes_async(original_path)
             
         except Exception as e:
-            logger.error(f"语音文件处理失败: {e}")
-            raise
+            logger.warning("管道转换失败，回退到文件转换: %s", e)
+            return None
     
-    async def _get_voice_file_path(self, voice: Record) -> Optional[str]:
-        """获取语音文件路径 - 集成多种策略"""
+    async def _get_voice_file_path(self, voice: Record) -> Tuple[Optional[str], bool]:
+        """获取语音文件路径 - 集成多种策略
+
+        Returns:
+            tuple: (语音文件路径, 是否由框架生成)
+        """
         try:
             # 首先尝试官方方法
             path = await voice.convert_to_file_path()
             if path and os.path.exists(path):
-                return path
+                return path, True
         except Exception as e:
-            logger.debug(f"官方方法获取路径失败: {e}")
+            logger.debug("官方方法获取路径失败: %s", e)
         
-        # 使用备用解析器
-        return await self.file_resolver.resolve_voice_file_path(voice)
+        # 使用备用解析器，下载文件的扩展名可能是按URL猜测的
+        return await self.file_resolver.resolve_voice_file_path(voice), False
     
-    def cleanup_resources(self):
-        """清理资源"""
-        self.audio_converter.cleanup_temp_files()
+    def cleanup_resources(self, file_paths: List[str] = None):
+        """清理资源，指定路径时只清理这些临时文件"""
+        self.audio_converter.cleanup_temp_files(file_paths)
         
+    async def close(self):
+        """释放后台资源，插件卸载时调用"""
+        await self.file_resolver.close()
+        shutdown_conversion_executor()
+    
     def get_processing_status(self) -> dict:
         """获取处理状态"""
         return {
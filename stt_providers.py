@@ -3,12 +3,24 @@ STT服务提供商配置和管理模块
 支持多种语音转文字服务提供商的统一接口
 """
 
+import asyncio
+import base64
+import json
+import functools
 import aiohttp
 import ssl
 import certifi
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional
 from astrbot.api import logger
 
+# 可选使用 orjson 加速STT响应解析，未安装时回退到标准库
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 class STTProviderConfig:
     """STT提供商配置类"""
     
@@ -142,6 +154,14 @@ class STTProviderConfig:
         config = cls.get_provider_config(provider_type)
         return config.get("supported_models", [])
 
+# 空闲连接的保持时间（秒）
+_KEEPALIVE_TIMEOUT_SECONDS = 30
+
+def _read_file_bytes(file_path: str) -> bytes:
+    """同步读取整个文件"""
+    with open(file_path, 'rb') as f:
+        return f.read()
+
 class STTProviderManager:
     """STT提供商管理器"""
     
@@ -164,8 +184,46 @@ class STTProviderManager:
             self.custom_content_type = kwargs.get("custom_content_type", "multipart/form-data")
             self.custom_response_path = kwargs.get("custom_response_path", "text")
         
+        # 长连接HTTP会话，首次请求时创建，通过 close() 释放
+        self._session: Optional[aiohttp.ClientSession] = None
+        # 当前会话是否已预热，每个会话只预热一次
+        self._session_warmed = False
+        
         logger.info(f"初始化STT提供商管理器: {self.provider_type}")
 
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享的HTTP会话，连接池在多次转录之间复用已建立的连接"""
+        if self._session is None or self._session.closed:
+            ssl_context = ssl.create_default_context(cafile=certifi.where())
+            connector = aiohttp.TCPConnector(
+                ssl=ssl_context,
+                limit=100,
+                limit_per_host=20,
+                keepalive_timeout=_KEEPALIVE_TIMEOUT_SECONDS
+            )
+            timeout = aiohttp.ClientTimeout(total=60)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._session_warmed = False
+        return self._session
+
+    async def ensure_connected(self):
+        """预先建立到STT服务的连接并放入连接池，每个HTTP会话只预热一次"""
+        session = self._get_session()
+        if self._session_warmed:
+            return
+        self._session_warmed = True
+        try:
+            async with session.head(self.api_base_url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                await response.read()
+        except Exception as e:
+            logger.debug(f"STT连接预热失败: {e}")
+
+    async def close(self):
+        """关闭共享的HTTP会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
     async def transcribe_audio(self, audio_file_path: str) -> str:
         """
         转录音频文件 - 统一处理MP3格式
@@ -173,6 +231,23 @@ class STTProviderManager:
         Args:
             audio_file_path: 音频文件路径（应该已经是MP3格式）
             
+        Returns:
+            str: 转录文本
+        """
+        if not self.api_key:
+            raise ValueError(f"{self.provider_type} API密钥未配置")
+        
+        # 读取音频文件，文件IO在线程中执行
+        audio_data = await asyncio.to_thread(_read_file_bytes, audio_file_path)
+        return await self.transcribe_audio_bytes(audio_data)
+
+    async def transcribe_audio_bytes(self, audio_data: bytes) -> str:
+        """
+        转录内存中的音频数据 - 统一处理MP3格式
+        
+        Args:
+            audio_data: MP3格式的音频数据
+            
         Returns:
             str: 转录文本
         """
@@ -182,21 +257,21 @@ class STTProviderManager:
 
             # 根据提供商类型选择处理方法
             if self.config["format"] == "openai":
-                return await self._transcribe_openai_format(audio_file_path)
+                return await self._transcribe_openai_format(audio_data)
             elif self.config["format"] == "deepgram":
-                return await self._transcribe_deepgram_format(audio_file_path)
+                return await self._transcribe_deepgram_format(audio_data)
             elif self.config["format"] == "other":
-                return await self._transcribe_other_format(audio_file_path)
+                return await self._transcribe_other_format(audio_data)
             else:
                 # 大部分提供商都兼容OpenAI格式
                 logger.info(f"使用OpenAI兼容格式处理 {self.provider_type}")
-                return await self._transcribe_openai_format(audio_file_path)
+                return await self._transcribe_openai_format(audio_data)
                 
         except Exception as e:
             logger.error(f"音频转录失败 ({self.provider_type}): {e}")
             raise
 
-    async def _transcribe_openai_format(self, audio_file_path: str) -> str:
+    async def _transcribe_openai_format(self, audio_data: bytes) -> str:
         """OpenAI格式转录 (OpenAI, Groq, SiliconFlow, MiniMax, Custom)"""
         api_url = f"{self.api_base_url.rstrip('/')}{self.config['endpoint']}"
         
@@ -222,36 +297,29 @@ class STTProviderManager:
 
         logger.info(f"使用 {self.provider_type} STT API: {api_url}")
 
-        # 读取音频文件
-        with open(audio_file_path, 'rb') as audio_file:
-            audio_data = audio_file.read()
-
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl=ssl_context)
-        timeout = aiohttp.ClientTimeout(total=60)
+        # 复用长连接会话，避免每次请求重新进行TCP和TLS握手
+        session = self._get_session()
+        # 使用multipart/form-data格式
+        data = aiohttp.FormData()
+        data.add_field('file', audio_data, filename='audio.mp3', content_type='audio/mpeg')
+        data.add_field('model', self.model)
+        data.add_field('response_format', 'json')
         
-        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-            # 使用multipart/form-data格式
-            data = aiohttp.FormData()
-            data.add_field('file', audio_data, filename='audio.mp3', content_type='audio/mpeg')
-            data.add_field('model', self.model)
-            data.add_field('response_format', 'json')
-            
-            async with session.post(api_url, headers=headers, data=data) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    transcript = result.get("text", "")
-                    if transcript:
-                        logger.info(f"{self.provider_type} STT识别成功")
-                        return transcript.strip()
-                    else:
-                        logger.warning(f"{self.provider_type} STT返回空结果")
-                        return ""
+        async with session.post(api_url, headers=headers, data=data) as response:
+            if response.status == 200:
+                result = await response.json(loads=_json_loads)
+                transcript = result.get("text", "")
+                if transcript:
+                    logger.info(f"{self.provider_type} STT识别成功")
+                    return transcript.strip()
                 else:
-                    error_text = await response.text()
-                    raise Exception(f"{self.provider_type} API请求失败: {response.status} - {error_text}")
+                    logger.warning(f"{self.provider_type} STT返回空结果")
+                    return ""
+            else:
+                error_text = await response.text()
+                raise Exception(f"{self.provider_type} API请求失败: {response.status} - {error_text}")
 
-    async def _transcribe_deepgram_format(self, audio_file_path: str) -> str:
+    async def _transcribe_deepgram_format(self, audio_data: bytes) -> str:
         """Deepgram格式转录"""
         api_url = f"{self.api_base_url.rstrip('/')}{self.config['endpoint']}"
         
@@ -280,39 +348,32 @@ class STTProviderManager:
 
         logger.info(f"使用 Deepgram STT API: {api_url}")
 
-        # 读取音频文件
-        with open(audio_file_path, 'rb') as audio_file:
-            audio_data = audio_file.read()
-
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl=ssl_context)
-        timeout = aiohttp.ClientTimeout(total=60)
-        
-        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-            async with session.post(api_url, headers=headers, params=params, data=audio_data) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    # Deepgram返回格式
-                    channels = result.get("results", {}).get("channels", [])
-                    if channels and len(channels) > 0:
-                        # channels是列表，需要取第一个元素
-                        first_channel = channels[0]
-                        alternatives = first_channel.get("alternatives", [])
-                        if alternatives and len(alternatives) > 0:
-                            # alternatives也是列表，需要取第一个元素
-                            first_alternative = alternatives[0]
-                            transcript = first_alternative.get("transcript", "")
-                            if transcript:
-                                logger.info("Deepgram STT识别成功")
-                                return transcript.strip()
-                    
-                    logger.warning("Deepgram STT返回空结果")
-                    return ""
-                else:
-                    error_text = await response.text()
-                    raise Exception(f"Deepgram API请求失败: {response.status} - {error_text}")
+        # 复用长连接会话，避免每次请求重新进行TCP和TLS握手
+        session = self._get_session()
+        async with session.post(api_url, headers=headers, params=params, data=audio_data) as response:
+            if response.status == 200:
+                result = await response.json(loads=_json_loads)
+                # Deepgram返回格式
+                channels = result.get("results", {}).get("channels", [])
+                if channels and len(channels) > 0:
+                    # channels是列表，需要取第一个元素
+                    first_channel = channels[0]
+                    alternatives = first_channel.get("alternatives", [])
+                    if alternatives and len(alternatives) > 0:
+                        # alternatives也是列表，需要取第一个元素
+                        first_alternative = alternatives[0]
+                        transcript = first_alternative.get("transcript", "")
+                        if transcript:
+                            logger.info("Deepgram STT识别成功")
+                            return transcript.strip()
+                
+                logger.warning("Deepgram STT返回空结果")
+                return ""
+            else:
+                error_text = await response.text()
+                raise Exception(f"Deepgram API请求失败: {response.status} - {error_text}")
 
-    async def _transcribe_other_format(self, audio_file_path: str) -> str:
+    async def _transcribe_other_format(self, audio_data: bytes) -> str:
         """完全自定义格式转录 - 支持任意API格式"""
         api_url = f"{self.api_base_url.rstrip('/')}{self.custom_endpoint}"
         
@@ -328,74 +389,66 @@ class STTProviderManager:
 
         logger.info(f"使用完全自定义格式 STT API: {api_url}")
 
-        # 读取音频文件
-        with open(audio_file_path, 'rb') as audio_file:
-            audio_data = audio_file.read()
-
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl=ssl_context)
-        timeout = aiohttp.ClientTimeout(total=60)
-        
-        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-            # 根据内容类型构建请求数据
-            if self.custom_content_type == "multipart/form-data":
-                # multipart/form-data格式
-                data = aiohttp.FormData()
-                data.add_field('file', audio_data, filename='audio.mp3', content_type='audio/mpeg')
-                
-                # 添加自定义请求体中的字段
-                for key, value in self.custom_request_body.items():
-                    # 支持变量替换
-                    if isinstance(value, str):
-                        value = value.format(
-                            model=self.model,
-                            api_key=self.api_key,
-                            audio_base64=None  # multipart模式不需要base64
-                        )
-                    data.add_field(key, str(value))
-                
-                request_data = data
-                
-            elif self.custom_content_type == "application/json":
-                # JSON格式 - 需要将音频转为base64
-                import base64
-                audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-                
-                # 构建JSON请求体
-                json_data = {}
-                for key, value in self.custom_request_body.items():
-                    if isinstance(value, str):
-                        value = value.format(
-                            model=self.model,
-                            api_key=self.api_key,
-                            audio_base64=audio_base64
-                        )
-                    json_data[key] = value
-                
-                headers["Content-Type"] = "application/json"
-                request_data = json_data
-                
-            else:  # application/octet-stream
-                # 直接发送音频数据
-                headers["Content-Type"] = self.custom_content_type
-                request_data = audio_data
+        # 复用长连接会话，避免每次请求重新进行TCP和TLS握手
+        session = self._get_session()
+        # 根据内容类型构建请求数据
+        if self.custom_content_type == "multipart/form-data":
+            # multipart/form-data格式
+            data = aiohttp.FormData()
+            data.add_field('file', audio_data, filename='audio.mp3', content_type='audio/mpeg')
+            
+            # 添加自定义请求体中的字段
+            for key, value in self.custom_request_body.items():
+                # 支持变量替换
+                if isinstance(value, str):
+                    value = value.format(
+                        model=self.model,
+                        api_key=self.api_key,
+                        audio_base64=None  # multipart模式不需要base64
+                    )
+                data.add_field(key, str(value))
             
-            # 发送请求
-            method = getattr(session, self.custom_request_method.lower())
+            request_data = data
             
-            if self.custom_content_type == "application/json":
-                async with method(api_url, headers=headers, json=request_data) as response:
-                    response_data = await self._handle_other_response(response)
-            else:
-                async with method(api_url, headers=headers, data=request_data) as response:
-                    response_data = await self._handle_other_response(response)
+        elif self.custom_content_type == "application/json":
+            # JSON格式 - 需要将音频转为base64
+            audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+            
+            # 构建JSON请求体
+            json_data = {}
+            for key, value in self.custom_request_body.items():
+                if isinstance(value, str):
+                    value = value.format(
+                        model=self.model,
+                        api_key=self.api_key,
+                        audio_base64=audio_base64
+                    )
+                json_data[key] = value
             
-            return response_data
+            headers["Content-Type"] = "application/json"
+            request_data = json_data
+            
+        else:  # application/octet-stream
+            # 直接发送音频数据
+            headers["Content-Type"] = self.custom_content_type
+            request_data = audio_data
+        
+        # 发送请求
+        method = getattr(session, self.custom_request_method.lower())
+        
+        if self.custom_content_type == "application/json":
+            async with method(api_url, headers=headers, json=request_data) as response:
+                response_data = await self._handle_other_response(response)
+        else:
+            async with method(api_url, headers=headers, data=request_data) as response:
+                response_data = await self._handle_other_response(response)
+        
+        return response_data
 
     async def _handle_other_response(self, response) -> str:
         """处理自定义格式的响应"""
         if response.status == 200:
-            result = await response.json()
+            result = await response.json(loads=_json_loads)
             
             # 根据自定义响应路径提取文本
             transcript = self._extract_text_by_path(result, self.custom_response_path)
@@ -435,16 +488,17 @@ class STTProviderManager:
             "format": self.config["format"]
         }
 
-def get_provider_default_config(provider_type: str) -> Dict[str, str]:
+@functools.lru_cache(maxsize=16)
+def get_provider_default_config(provider_type: str) -> Mapping[str, str]:
     """
     获取指定提供商的默认配置
-    用于前端动态更新配置表单
+    用于前端动态更新配置表单，结果按提供商类型缓存，返回只读映射
     """
     config = STTProviderConfig.get_provider_config(provider_type)
-    return {
+    return MappingProxyType({
         "api_base_url": config["api_base_url"],
         "default_model": config["default_model"]
-    }
+    })
 
 # 提供商配置映射表，用于前端配置界面
 PROVIDER_DISPLAY_CONFIGS = {
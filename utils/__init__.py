@@ -9,12 +9,14 @@ from .decorators import (
     validate_input,
     cache_result
 )
+from .metrics import StageMetrics
 
 __all__ = [
     'async_operation_handler',
     'retry_on_failure', 
     'validate_input',
-    'cache_result'
+    'cache_result',
+    'StageMetrics'
 ]
 
 # 版本信息
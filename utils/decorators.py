@@ -3,8 +3,9 @@
 """
 import functools
 import asyncio
+import inspect
 import time
-from typing import Any, Callable
+from typing import Any, Callable, Tuple, Type
 from astrbot.api import logger
 from ..exceptions import VoiceToTextError
 
@@ -12,7 +13,6 @@ def async_operation_handler(operation_name: str, log_performance: bool = True):
     """异步操作处理装饰器 - 统一异常处理和性能监控，支持异步生成器"""
     def decorator(func: Callable) -> Callable:
         # 检查原函数是否是异步生成器函数
-        import inspect
         is_async_gen = inspect.isasyncgenfunction(func)
         
         if is_async_gen:
@@ -21,21 +21,21 @@ def async_operation_handler(operation_name: str, log_performance: bool = True):
             async def async_gen_wrapper(*args, **kwargs):
                 start_time = time.time() if log_performance else None
                 try:
-                    logger.info(f"开始{operation_name}")
+                    logger.info("开始%s", operation_name)
                     
                     async for item in func(*args, **kwargs):
                         yield item
                     
                     if log_performance:
                         duration = time.time() - start_time
-                        logger.info(f"{operation_name}成功 - 耗时: {duration:.2f}秒")
+                        logger.info("%s成功 - 耗时: %.2f秒", operation_name, duration)
                     else:
-                        logger.info(f"{operation_name}成功")
+                        logger.info("%s成功", operation_name)
                         
                 except VoiceToTextError:
                     raise
                 except Exception as e:
-                    logger.error(f"{operation_name}失败: {e}")
+                    logger.error("%s失败: %s", operation_name, e)
                     raise VoiceToTextError(f"{operation_name}失败: {str(e)}") from e
             
             return async_gen_wrapper
@@ -45,28 +45,40 @@ def async_operation_handler(operation_name: str, log_performance: bool = True):
             async def async_wrapper(*args, **kwargs):
                 start_time = time.time() if log_performance else None
                 try:
-                    logger.info(f"开始{operation_name}")
+                    logger.info("开始%s", operation_name)
                     result = await func(*args, **kwargs)
                     
                     if log_performance:
                         duration = time.time() - start_time
-                        logger.info(f"{operation_name}成功 - 耗时: {duration:.2f}秒")
+                        logger.info("%s成功 - 耗时: %.2f秒", operation_name, duration)
                     else:
-                        logger.info(f"{operation_name}成功")
+                        logger.info("%s成功", operation_name)
                     
                     return result
                     
                 except VoiceToTextError:
                     raise
                 except Exception as e:
-                    logger.error(f"{operation_name}失败: {e}")
+                    logger.error("%s失败: %s", operation_name, e)
                     raise VoiceToTextError(f"{operation_name}失败: {str(e)}") from e
             
             return async_wrapper
     return decorator
 
-def retry_on_failure(max_retries: int = 2, delay: float = 1.0, exponential_backoff: bool = True):
-    """重试装饰器 - 支持指数退避"""
+def retry_on_failure(max_retries: int = 2, delay: float = 1.0, exponential_backoff: bool = True,
+                     retry_on: Tuple[Type[BaseException], ...] = (Exception,), max_delay: float = None):
+    """重试装饰器 - 支持指数退避
+    
+    Args:
+        max_retries: 最大重试次数
+        delay: 初始重试间隔（秒）
+        exponential_backoff: 是否按指数增长重试间隔
+        retry_on: 需要重试的异常类型；异常本身或其直接原因(__cause__)匹配时才重试，其他异常立即抛出
+        max_delay: 重试间隔上限（秒），为None时不限制
+    """
+    def should_retry(error: BaseException) -> bool:
+        return isinstance(error, retry_on) or isinstance(error.__cause__, retry_on)
+    
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
@@ -77,12 +89,16 @@ def retry_on_failure(max_retries: int = 2, delay: float = 1.0, exponential_backo
                     return await func(*args, **kwargs)
                 except Exception as e:
                     last_exception = e
+                    if not should_retry(e):
+                        raise
                     if attempt < max_retries:
                         current_delay = delay * (2 ** attempt) if exponential_backoff else delay
-                        logger.warning(f"操作失败，{current_delay:.1f}秒后重试 (第{attempt + 1}/{max_retries + 1}次): {e}")
+                        if max_delay is not None:
+                            current_delay = min(current_delay, max_delay)
+                        logger.warning("操作失败，%.1f秒后重试 (第%s/%s次): %s", current_delay, attempt + 1, max_retries + 1, e)
                         await asyncio.sleep(current_delay)
                     else:
-                        logger.error(f"所有重试都失败了: {e}")
+                        logger.error("所有重试都失败了: %s", e)
             
             raise last_exception
         return wrapper
@@ -118,7 +134,7 @@ def cache_result(cache_key_func: Callable = None, ttl_seconds: int = 300):
             if cache_key in cache:
                 cached_result, cached_time = cache[cache_key]
                 if current_time - cached_time < ttl_seconds:
-                    logger.debug(f"使用缓存结果: {cache_key}")
+                    logger.debug("使用缓存结果: %s", cache_key)
                     return cached_result
             
             # 执行函数并缓存结果
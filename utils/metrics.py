@@ -0,0 +1,46 @@
+"""
+性能指标工具 - 记录各处理阶段耗时并计算分位数
+"""
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict
+
+
+class StageMetrics:
+    """阶段耗时统计 - 每个阶段保留最近若干次采样的环形缓冲区"""
+
+    def __init__(self, max_samples: int = 256):
+        self.max_samples = max_samples
+        self._samples: Dict[str, Deque[int]] = {}
+
+    def observe(self, stage: str, duration_ns: int):
+        """记录一次阶段耗时（纳秒）"""
+        samples = self._samples.get(stage)
+        if samples is None:
+            samples = self._samples[stage] = deque(maxlen=self.max_samples)
+        samples.append(duration_ns)
+
+    @contextmanager
+    def measure(self, stage: str):
+        """测量代码块耗时的上下文管理器"""
+        start = time.monotonic_ns()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.monotonic_ns() - start)
+
+    def summary(self) -> Dict[str, dict]:
+        """获取各阶段的采样数和 p50/p95 耗时（毫秒）"""
+        result = {}
+        for stage, samples in self._samples.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            count = len(ordered)
+            result[stage] = {
+                'count': count,
+                'p50_ms': ordered[(count - 1) // 2] / 1_000_000,
+                'p95_ms': ordered[min(count - 1, int(count * 0.95))] / 1_000_000,
+            }
+        return result
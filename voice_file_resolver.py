@@ -3,15 +3,63 @@ import asyncio
 import time
 import tempfile
 import uuid
-import glob
 import base64
 import aiohttp
 import ssl
 import certifi
+from typing import Optional
+from urllib.parse import urlsplit
 from astrbot.api.message_components import Record
 from astrbot.api import logger
 from astrbot.core.utils.astrbot_path import get_astrbot_data_path
 from astrbot.core.utils.io import download_image_by_url
+from .core.audio_format_detector import sniff_format
+
+# 按文件名搜索目录树时的最大深度，避免在大型数据目录中全量遍历
+_SEARCH_MAX_DEPTH = 4
+# 搜索时跳过的目录，其中不会存放语音文件
+_SEARCH_SKIP_DIRS = frozenset(('.git', '__pycache__', 'node_modules', 'site-packages'))
+
+# 下载音频时每次读取的块大小，以及文件写缓冲区大小
+_DOWNLOAD_CHUNK_SIZE = 1 << 16
+_DOWNLOAD_WRITE_BUFFER_SIZE = 1 << 20
+# 检测音频格式所需的文件头长度
+_CONTENT_SNIFF_SIZE = 20
+
+# 常见文件系统的文件名长度上限，超出的file属性不可能是本地文件名
+_MAX_FILENAME_LENGTH = 255
+
+# 解析时读取一次的语音对象属性
+_VOICE_SNAPSHOT_ATTRS = ('file', 'url', 'path', 'magic', 'cache', 'proxy', 'timeout')
+
+# 可从URL路径后缀识别的音频扩展名
+_URL_AUDIO_EXTENSIONS = frozenset(('.amr', '.mp3', '.wav', '.ogg', '.silk', '.m4a', '.flac'))
+
+
+def _find_file_fast(root: str, target_name: str, max_depth: int = _SEARCH_MAX_DEPTH) -> Optional[str]:
+    """
+    在目录树中查找指定文件名的非空文件，找到第一个即返回
+
+    使用 os.scandir 显式栈遍历，复用目录项中的类型信息，不跟随目录符号链接
+    """
+    stack = [(root, 0)]
+    while stack:
+        directory, depth = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.name == target_name:
+                            if entry.is_file() and entry.stat().st_size > 0:
+                                return entry.path
+                        elif (depth < max_depth and entry.name not in _SEARCH_SKIP_DIRS
+                              and entry.is_dir(follow_symlinks=False)):
+                            stack.append((entry.path, depth + 1))
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return None
 
 
 class VoiceFileResolver:
@@ -19,7 +67,27 @@ class VoiceFileResolver:
     
     def __init__(self):
         """初始化语音文件解析器"""
+        self._astrbot_data_path = get_astrbot_data_path()
+        # 下载和解码得到的语音文件存放目录，只在初始化时创建一次
+        self._temp_dir = os.path.normpath(os.path.join(self._astrbot_data_path, "temp"))
+        os.makedirs(self._temp_dir, exist_ok=True)
+        # 下载用的HTTP会话，首次下载时创建，多次下载之间复用SSL上下文和连接池
+        self._http_session: Optional[aiohttp.ClientSession] = None
         logger.debug("初始化VoiceFileResolver")
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享的下载会话"""
+        if self._http_session is None or self._http_session.closed:
+            ssl_context = ssl.create_default_context(cafile=certifi.where())
+            connector = aiohttp.TCPConnector(ssl=ssl_context)
+            self._http_session = aiohttp.ClientSession(trust_env=True, connector=connector)
+        return self._http_session
+    
+    async def close(self):
+        """关闭共享的下载会话"""
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
         
     async def resolve_voice_file_path(self, voice: Record) -> str:
         """
@@ -31,47 +99,49 @@ class VoiceFileResolver:
         Returns:
             str: 解析后的文件路径，如果失败返回None
         """
-        logger.info("开始尝试所有语音资源获取方法")
+        logger.debug("开始尝试所有语音资源获取方法")
         
-        # 记录Voice对象的所有属性，用于调试
-        voice_attrs = {
-            'file': getattr(voice, 'file', None),
-            'url': getattr(voice, 'url', None), 
-            'path': getattr(voice, 'path', None),
-            'magic': getattr(voice, 'magic', None),
-            'cache': getattr(voice, 'cache', None),
-            'proxy': getattr(voice, 'proxy', None),
-            'timeout': getattr(voice, 'timeout', None)
-        }
-        logger.debug(f"Voice对象属性: {voice_attrs}")
+        # 一次读取Voice对象的属性快照，既用于调试日志，也用于筛选策略
+        voice_attrs = {name: getattr(voice, name, None) for name in _VOICE_SNAPSHOT_ATTRS}
+        logger.debug("Voice对象属性: %s", voice_attrs)
         
-        # 解析策略列表：按优先级排序
+        # 预先判断语音对象具备哪些属性，跳过注定无法成功的策略
+        voice_file = voice_attrs['file']
+        file_is_bare = (
+            bool(voice_file)
+            and len(voice_file) <= _MAX_FILENAME_LENGTH
+            and not voice_file.startswith(('file:///', 'http://', 'https://', 'base64://'))
+        )
+        
+        # 解析策略列表：按优先级排序，每项为 (名称, 策略函数, 参数)
         strategies = [
-            ("官方convert_to_file_path", self._strategy_official_convert),
-            ("Base64转换方法", self._strategy_base64_conversion),
-            ("文件服务注册方法", self._strategy_file_service_registration), 
-            ("Path属性直接访问", self._strategy_path_attribute),
-            ("URL属性下载", self._strategy_url_download),
-            ("File属性处理", self._strategy_file_attribute),
-            ("相对路径搜索", self._strategy_relative_path_search),
-            ("临时目录搜索", self._strategy_temp_directory_search),
-            ("系统默认目录搜索", self._strategy_system_directory_search),
-            ("文件名模式匹配", self._strategy_filename_pattern_matching)
+            ("官方convert_to_file_path", self._strategy_official_convert, voice),
+            ("Base64转换方法", self._strategy_base64_conversion, voice),
+            ("文件服务注册方法", self._strategy_file_service_registration, voice), 
         ]
+        if voice_attrs['path']:
+            strategies.append(("Path属性直接访问", self._strategy_path_attribute, voice_attrs['path']))
+        if voice_attrs['url']:
+            strategies.append(("URL属性下载", self._strategy_url_download, voice_attrs['url']))
+        if voice_file:
+            strategies.append(("File属性处理", self._strategy_file_attribute, voice))
+        # 目录搜索只对普通文件名有意义，URL、base64数据等直接跳过，避免拼接和stat超长路径
+        if file_is_bare:
+            strategies.extend((
+                ("相对路径搜索", self._strategy_relative_path_search, voice),
+                ("临时目录搜索", self._strategy_temp_directory_search, voice),
+                ("系统默认目录搜索", self._strategy_system_directory_search, voice),
+                ("文件名模式匹配", self._strategy_filename_pattern_matching, voice)
+            ))
         
-        # 逐一尝试所有策略
-        for strategy_name, strategy_func in strategies:
-            try:
-                logger.info(f"尝试策略: {strategy_name}")
-                result = await strategy_func(voice)
-                if result and os.path.exists(result):
-                    logger.info(f"策略 '{strategy_name}' 成功获取文件: {result}")
-                    return result
-                else:
-                    logger.debug(f"策略 '{strategy_name}' 未获取到有效文件")
-            except Exception as e:
-                logger.warning(f"策略 '{strategy_name}' 执行失败: {e}")
-                continue
+        # 逐一尝试所有策略，各策略自行处理异常，失败时返回None
+        for strategy_name, strategy_func, strategy_arg in strategies:
+            logger.debug(f"尝试策略: {strategy_name}")
+            result = await strategy_func(strategy_arg)
+            if result and os.path.exists(result):
+                logger.info(f"策略 '{strategy_name}' 成功获取文件: {result}")
+                return result
+            logger.debug(f"策略 '{strategy_name}' 未获取到有效文件")
         
         logger.error("所有语音资源获取策略都已尝试，均未成功")
         return None
@@ -81,37 +151,25 @@ class VoiceFileResolver:
         try:
             return await voice.convert_to_file_path()
         except Exception as original_error:
-            logger.debug(f"官方convert_to_file_path失败: {original_error}")
-            
             # 如果是"not a valid file"错误，尝试修复文件路径
             if "not a valid file" in str(original_error) and voice.file:
                 # 尝试在AstrBot数据目录中查找文件
                 possible_paths = await self._search_file_in_astrbot_dirs(voice.file)
                 if possible_paths:
-                    logger.info(f"在AstrBot目录中找到文件: {possible_paths}")
+                    logger.debug(f"在AstrBot目录中找到文件: {possible_paths}")
                     return possible_paths[0]  # 修复：返回第一个匹配项而不是整个列表
-
             
-            raise original_error
+            logger.warning(f"官方convert_to_file_path失败: {original_error}")
+            return None
 
     async def _strategy_base64_conversion(self, voice: Record) -> str:
         """策略2: Base64数据转换"""
         try:
             base64_data = await voice.convert_to_base64()
             if base64_data:
-                # 解码base64并保存为临时文件
-                file_extension = self._detect_audio_extension_from_base64(base64_data)
-                temp_dir = os.path.join(get_astrbot_data_path(), "temp") 
-                os.makedirs(temp_dir, exist_ok=True)
-                
-                temp_file = os.path.join(temp_dir, f"voice_{uuid.uuid4().hex}{file_extension}")
-                
-                # 解码并写入文件
-                audio_bytes = base64.b64decode(base64_data)
-                with open(temp_file, 'wb') as f:
-                    f.write(audio_bytes)
-                
-                logger.info(f"Base64转换成功，临时文件: {temp_file}")
+                # 解码base64并保存为临时文件，解码和写盘在线程中进行，不阻塞事件循环
+                temp_file = await asyncio.to_thread(self._save_base64_audio, base64_data)
+                logger.debug(f"Base64转换成功，临时文件: {temp_file}")
                 return temp_file
         except Exception as e:
             logger.debug(f"Base64转换失败: {e}")
@@ -125,32 +183,29 @@ class VoiceFileResolver:
             if file_service_url:
                 # 从文件服务URL下载文件
                 downloaded_path = await download_image_by_url(file_service_url)
-                logger.info(f"文件服务注册并下载成功: {downloaded_path}")
+                logger.debug(f"文件服务注册并下载成功: {downloaded_path}")
                 return downloaded_path
         except Exception as e:
             logger.debug(f"文件服务注册失败: {e}")
             return None
 
-    async def _strategy_path_attribute(self, voice: Record) -> str:
-        """策略4: 直接使用path属性"""
-        if hasattr(voice, 'path') and voice.path:
-            if os.path.exists(voice.path):
-                logger.info(f"Path属性直接命中: {voice.path}")
-                return voice.path
-            else:
-                logger.debug(f"Path属性文件不存在: {voice.path}")
+    async def _strategy_path_attribute(self, path: str) -> str:
+        """策略4: 直接使用path属性（调用方已确认非空）"""
+        if os.path.exists(path):
+            logger.debug(f"Path属性直接命中: {path}")
+            return path
+        logger.debug(f"Path属性文件不存在: {path}")
         return None
 
-    async def _strategy_url_download(self, voice: Record) -> str:
-        """策略5: URL下载"""
-        if hasattr(voice, 'url') and voice.url:
-            try:
-                # 使用自定义音频下载函数
-                downloaded_path = await self._download_audio_file(voice.url)
-                logger.info(f"URL下载成功: {downloaded_path}")
-                return downloaded_path
-            except Exception as e:
-                logger.debug(f"URL下载失败: {e}")
+    async def _strategy_url_download(self, url: str) -> str:
+        """策略5: URL下载（调用方已确认非空）"""
+        try:
+            # 使用自定义音频下载函数
+            downloaded_path = await self._download_audio_file(url)
+            logger.debug(f"URL下载成功: {downloaded_path}")
+            return downloaded_path
+        except Exception as e:
+            logger.debug(f"URL下载失败: {e}")
         return None
 
     async def _strategy_file_attribute(self, voice: Record) -> str:
@@ -160,21 +215,21 @@ class VoiceFileResolver:
             
         # 情况1: 文件直接存在
         if os.path.exists(voice.file):
-            logger.info(f"File属性直接命中: {voice.file}")
+            logger.debug(f"File属性直接命中: {voice.file}")
             return os.path.abspath(voice.file)
             
         # 情况2: file:// 协议处理
         if voice.file.startswith("file:///"):
             file_path = voice.file[8:]  # 去掉 file:///
             if os.path.exists(file_path):
-                logger.info(f"File协议解析成功: {file_path}")
+                logger.debug(f"File协议解析成功: {file_path}")
                 return file_path
                 
         # 情况3: HTTP/HTTPS URL
         if voice.file.startswith(("http://", "https://")):
             try:
                 downloaded_path = await download_image_by_url(voice.file)
-                logger.info(f"File URL下载成功: {downloaded_path}")
+                logger.debug(f"File URL下载成功: {downloaded_path}")
                 return downloaded_path
             except Exception as e:
                 logger.debug(f"File URL下载失败: {e}")
@@ -183,17 +238,8 @@ class VoiceFileResolver:
         if voice.file.startswith("base64://"):
             try:
                 base64_data = voice.file[9:]  # 去掉 base64://
-                temp_dir = os.path.join(get_astrbot_data_path(), "temp")
-                os.makedirs(temp_dir, exist_ok=True)
-                
-                file_extension = self._detect_audio_extension_from_base64(base64_data)
-                temp_file = os.path.join(temp_dir, f"voice_{uuid.uuid4().hex}{file_extension}")
-                
-                audio_bytes = base64.b64decode(base64_data)
-                with open(temp_file, 'wb') as f:
-                    f.write(audio_bytes)
-                    
-                logger.info(f"File base64解码成功: {temp_file}")
+                temp_file = await asyncio.to_thread(self._save_base64_audio, base64_data)
+                logger.debug(f"File base64解码成功: {temp_file}")
                 return temp_file
             except Exception as e:
                 logger.debug(f"File base64解码失败: {e}")
@@ -213,12 +259,12 @@ class VoiceFileResolver:
             os.path.join(os.getcwd(), "cache"),
         ]
         
+        # 目标文件存在即说明目录存在，无需单独检查目录
         for search_dir in search_dirs:
-            if os.path.exists(search_dir):
-                full_path = os.path.join(search_dir, voice.file)
-                if os.path.exists(full_path):
-                    logger.info(f"相对路径搜索成功: {full_path}")
-                    return full_path
+            full_path = os.path.join(search_dir, voice.file)
+            if os.path.exists(full_path):
+                logger.debug(f"相对路径搜索成功: {full_path}")
+                return full_path
         return None
 
     async def _strategy_temp_directory_search(self, voice: Record) -> str:
@@ -234,16 +280,13 @@ class VoiceFileResolver:
         ]
         
         # 添加AstrBot的临时目录
-        try:
-            temp_dirs.append(os.path.join(get_astrbot_data_path(), "temp"))
-        except:
-            pass
+        temp_dirs.append(self._temp_dir)
             
         for temp_dir in temp_dirs:
-            if temp_dir and os.path.exists(temp_dir):
+            if temp_dir:
                 full_path = os.path.join(temp_dir, voice.file)
                 if os.path.exists(full_path):
-                    logger.info(f"临时目录搜索成功: {full_path}")
+                    logger.debug(f"临时目录搜索成功: {full_path}")
                     return full_path
         return None
 
@@ -261,10 +304,10 @@ class VoiceFileResolver:
         ]
         
         for sys_dir in system_dirs:
-            if sys_dir and os.path.exists(sys_dir):
+            if sys_dir:
                 full_path = os.path.join(sys_dir, voice.file)
                 if os.path.exists(full_path):
-                    logger.info(f"系统目录搜索成功: {full_path}")
+                    logger.debug(f"系统目录搜索成功: {full_path}")
                     return full_path
         return None
 
@@ -273,51 +316,45 @@ class VoiceFileResolver:
         if not voice.file:
             return None
             
-        # 搜索模式：在各种目录下查找类似的文件名
-        search_patterns = [
-            os.path.join(get_astrbot_data_path(), "**", voice.file),
-            os.path.join(get_astrbot_data_path(), "**", f"*{voice.file}*"),
-            os.path.join(tempfile.gettempdir(), f"*{voice.file}*"),
-            os.path.join(os.getcwd(), "**", f"*{voice.file}*"),
-        ]
-        
-        for pattern in search_patterns:
-            try:
-                matches = glob.glob(pattern, recursive=True)
-                for match in matches:
-                    if os.path.isfile(match):
-                        logger.info(f"模式匹配成功: {match}")
-                        return match
-            except Exception as e:
-                logger.debug(f"模式匹配失败 {pattern}: {e}")
-                continue
+        # 在各种目录下按文件名有限深度查找，模糊的子串匹配容易命中无关文件，不再使用
+        search_roots = (self._astrbot_data_path, tempfile.gettempdir(), os.getcwd())
+        target_name = os.path.basename(voice.file)
+        for root in search_roots:
+            match = await asyncio.to_thread(_find_file_fast, root, target_name)
+            if match:
+                logger.debug(f"模式匹配成功: {match}")
+                return match
         
         return None
 
     # 辅助方法
+    def _save_base64_audio(self, base64_data: str) -> str:
+        """同步解码base64音频数据并写入临时文件，只解码一次，格式从解码后的文件头检测"""
+        audio_bytes = base64.b64decode(base64_data)
+        file_extension = self._detect_audio_extension_from_content(audio_bytes) or '.audio'
+        temp_file = os.path.join(self._temp_dir, f"voice_{uuid.uuid4().hex}{file_extension}")
+        with open(temp_file, 'wb') as f:
+            f.write(audio_bytes)
+        return temp_file
+    
     async def _search_file_in_astrbot_dirs(self, filename: str) -> str:
         """在AstrBot相关目录中搜索文件"""
         search_paths = []
         try:
-            astrbot_data_path = get_astrbot_data_path()
-            search_locations = [
-                os.path.join(astrbot_data_path, "**", filename),
-                os.path.join(astrbot_data_path, "temp", "**", filename),
-                os.path.join("/tmp", "**", filename),
-                os.path.join(tempfile.gettempdir(), "**", filename),
-                # 搜索任何包含该文件名的文件
-                os.path.join(astrbot_data_path, "**", f"*{filename}*"),
-            ]
+            # 语音文件最可能位于temp目录，优先搜索
+            search_roots = dict.fromkeys((
+                self._temp_dir,
+                self._astrbot_data_path,
+                "/tmp",
+                tempfile.gettempdir(),
+            ))
+            target_name = os.path.basename(filename)
             
-            for search_pattern in search_locations:
-                try:
-                    matches = glob.glob(search_pattern, recursive=True)
-                    for match in matches:
-                        if os.path.isfile(match) and os.path.getsize(match) > 0:
-                            search_paths.append(os.path.abspath(match))
-                except Exception as e:
-                    logger.debug(f"搜索模式失败 {search_pattern}: {e}")
-                    continue
+            for root in search_roots:
+                match = await asyncio.to_thread(_find_file_fast, root, target_name)
+                if match:
+                    search_paths.append(os.path.abspath(match))
+                    break
                     
         except Exception as e:
             logger.debug(f"AstrBot目录搜索失败: {e}")
@@ -327,9 +364,7 @@ class VoiceFileResolver:
     async def _download_audio_file(self, url: str) -> str:
         """专用的音频文件下载函数，正确处理文件扩展名"""
         try:
-            # 创建临时目录
-            temp_dir = os.path.normpath(os.path.join(get_astrbot_data_path(), "temp"))
-            os.makedirs(temp_dir, exist_ok=True)
+            temp_dir = self._temp_dir
             
             # 从URL推测文件扩展名
             file_extension = self._guess_audio_extension_from_url(url)
@@ -339,89 +374,54 @@ class VoiceFileResolver:
             safe_filename = f"{timestamp}{file_extension}".replace(":", "_").replace("/", "_").replace("\\", "_")
             temp_file_path = os.path.normpath(os.path.join(temp_dir, safe_filename))
             
-            # 下载文件
-            ssl_context = ssl.create_default_context(cafile=certifi.where())
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
-            
-            async with aiohttp.ClientSession(trust_env=True, connector=connector) as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        content = await response.read()
-                        
-                        # 根据实际内容检测格式
-                        actual_extension = self._detect_audio_extension_from_content(content)
-                        if actual_extension and actual_extension != file_extension:
-                            final_file_path = os.path.join(temp_dir, f"{timestamp}{actual_extension}")
-                        else:
-                            final_file_path = temp_file_path
-                        
-                        with open(final_file_path, 'wb') as f:
-                            f.write(content)
-                        
-                        logger.info(f"音频文件下载成功: {final_file_path}")
-                        return final_file_path
+            # 下载文件，复用共享会话
+            session = self._get_session()
+            async with session.get(url) as response:
+                if response.status == 200:
+                    # 只缓冲检测格式所需的文件头，其余内容边下载边写入，不在内存中保留整个文件
+                    chunks = response.content.iter_chunked(_DOWNLOAD_CHUNK_SIZE)
+                    head = b''
+                    async for chunk in chunks:
+                        head += chunk
+                        if len(head) >= _CONTENT_SNIFF_SIZE:
+                            break
+                    
+                    # 根据实际内容检测格式
+                    actual_extension = self._detect_audio_extension_from_content(head)
+                    if actual_extension and actual_extension != file_extension:
+                        final_file_path = os.path.join(temp_dir, f"{timestamp}{actual_extension}")
                     else:
-                        raise Exception(f"下载失败，HTTP状态码: {response.status}")
-                        
+                        final_file_path = temp_file_path
+                    
+                    try:
+                        with open(final_file_path, 'wb', buffering=_DOWNLOAD_WRITE_BUFFER_SIZE) as f:
+                            f.write(head)
+                            async for chunk in chunks:
+                                f.write(chunk)
+                    except BaseException:
+                        # 下载中途断开或超时时删除写了一半的文件，不留下截断的音频
+                        try:
+                            os.remove(final_file_path)
+                        except OSError:
+                            pass
+                        raise
+                    
+                    logger.debug(f"音频文件下载成功: {final_file_path}")
+                    return final_file_path
+                else:
+                    raise Exception(f"下载失败，HTTP状态码: {response.status}")
+                    
         except Exception as e:
             logger.error(f"音频文件下载失败: {e}")
             raise
 
     def _guess_audio_extension_from_url(self, url: str) -> str:
         """从URL推测音频文件扩展名"""
-        url_lower = url.lower()
-        if '.amr' in url_lower:
-            return '.amr'
-        elif '.mp3' in url_lower:
-            return '.mp3'
-        elif '.wav' in url_lower:
-            return '.wav'
-        elif '.ogg' in url_lower:
-            return '.ogg'
-        elif '.silk' in url_lower:
-            return '.silk'
-        elif '.m4a' in url_lower:
-            return '.m4a'
-        elif '.flac' in url_lower:
-            return '.flac'
-        else:
-            return '.audio'  # 默认扩展名
-
-    def _detect_audio_extension_from_content(self, content: bytes) -> str:
-        """从文件内容检测音频文件扩展名"""
-        try:
-            if content.startswith(b'#!AMR'):
-                return '.amr'
-            elif content.startswith(b'RIFF') and b'WAVE' in content[:20]:
-                return '.wav'
-            elif content.startswith(b'ID3') or content[0:2] in [b'\xff\xfb', b'\xff\xf3']:
-                return '.mp3'
-            elif content.startswith(b'OggS'):
-                return '.ogg'
-            elif content.startswith(b'\x02#!SILK_V3'):
-                return '.silk'
-            else:
-                return None  # 无法确定格式
-        except:
-            return None
+        # 只看URL路径部分的后缀，查询参数中出现的扩展名不会误判
+        extension = os.path.splitext(urlsplit(url).path)[1].lower()
+        return extension if extension in _URL_AUDIO_EXTENSIONS else '.audio'  # 默认扩展名
 
-    def _detect_audio_extension_from_base64(self, base64_data: str) -> str:
-        """从base64数据中检测音频文件扩展名"""
-        try:
-            # 解码前几个字节来检测文件类型
-            decoded_header = base64.b64decode(base64_data[:50])
-            
-            if decoded_header.startswith(b'#!AMR'):
-                return '.amr'
-            elif decoded_header.startswith(b'RIFF'):
-                return '.wav'
-            elif decoded_header.startswith(b'ID3') or decoded_header[0:2] in [b'\xff\xfb', b'\xff\xf3']:
-                return '.mp3'
-            elif decoded_header.startswith(b'OggS'):
-                return '.ogg'
-            elif decoded_header.startswith(b'\x02#!SILK_V3'):
-                return '.silk'
-            else:
-                return '.audio'  # 默认扩展名
-        except:
-            return '.audio'
+    def _detect_audio_extension_from_content(self, content: bytes) -> Optional[str]:
+        """从文件内容检测音频文件扩展名，与格式检测器共用同一张文件头签名表"""
+        format_name = sniff_format(content)
+        return f'.{format_name}' if format_name else None  # 无法确定格式时返回None